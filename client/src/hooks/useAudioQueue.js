@@ -13,7 +13,8 @@ import { useCallback, useEffect, useRef } from "react";
  * @param {{ onPlay, onEnd }} options
  *   onPlay() — called the moment each audio clip starts playing
  *   onEnd()  — called the moment each audio clip finishes (or errors)
- * @returns {{ audioRef, push }}
+ * @returns {{ audioRef, push, flush }}
+ *   flush() — stop the current clip and drop everything queued (barge-in)
  */
 export function useAudioQueue({ onPlay, onEnd } = {}) {
   const audioRef = useRef(null);
@@ -79,5 +80,21 @@ export function useAudioQueue({ onPlay, onEnd } = {}) {
     playNextRef.current?.();
   }, []);
 
-  return { audioRef, push };
+  const flush = useCallback(() => {
+    for (const url of queueRef.current) URL.revokeObjectURL(url);
+    queueRef.current = [];
+    const audio = audioRef.current;
+    if (audio && isPlayingRef.current) {
+      // Detach handlers first so the interrupted clip cannot advance the queue
+      audio.onended = null;
+      audio.onerror = null;
+      audio.pause();
+      URL.revokeObjectURL(audio.src);
+      audio.removeAttribute("src");
+      isPlayingRef.current = false;
+      onEndRef.current?.();
+    }
+  }, []);
+
+  return { audioRef, push, flush };
 }
@@ -33,27 +33,37 @@ async function getWsUrl() {
   return "wss://rendersal.onrender.com/lila/ws";
 }
 
+// Append the resume token of the session a dropped socket belonged to, so
+// the server continues that session instead of starting a new one.
+function withResumeToken(url, resumeToken) {
+  if (!resumeToken) return url;
+  const sep = url.includes("?") ? "&" : "?";
+  return `${url}${sep}resume=${encodeURIComponent(resumeToken)}`;
+}
+
 const SAMPLE_RATE = 24000;
 
 /**
  * Manages the WebSocket connection, microphone recording, and message routing.
  *
- * @param {{ onStatus, onTranscript, onAudio, onMsgCount, enabled, speechTimeRef }} options
+ * @param {{ onStatus, onTranscript, onAudio, onFlush, onMsgCount, enabled, speechTimeRef }} options
+ *   onFlush — called when the server interrupts Lila (barge-in); drop any
+ *   audio that is playing or queued.
  *   speechTimeRef — optional React ref (MutableRefObject<number>) whose .current
  *   is stamped with Date.now() each time the user sends an audio chunk.
  *   Pass your own ref from the parent component to share the timestamp.
  * @returns {{ wsRef }}
  */
-export function useWebSocket({ onStatus, onTranscript, onUserTranscript, onAudio, onMsgCount, enabled = true, speechTimeRef = null }) {
+export function useWebSocket({ onStatus, onTranscript, onUserTranscript, onAudio, onFlush, onMsgCount, enabled = true, speechTimeRef = null }) {
   const wsRef = useRef(null);
   const mediaRecorderRef = useRef(null);
   const streamRef = useRef(null);
   
   // Keep fresh references to callbacks so we don't need them in the dependency array
-  const callbacksRef = useRef({ onStatus, onTranscript, onUserTranscript, onAudio, onMsgCount });
+  const callbacksRef = useRef({ onStatus, onTranscript, onUserTranscript, onAudio, onFlush, onMsgCount });
   useEffect(() => {
-    callbacksRef.current = { onStatus, onTranscript, onUserTranscript, onAudio, onMsgCount };
-  }, [onStatus, onTranscript, onUserTranscript, onAudio, onMsgCount]);
+    callbacksRef.current = { onStatus, onTranscript, onUserTranscript, onAudio, onFlush, onMsgCount };
+  }, [onStatus, onTranscript, onUserTranscript, onAudio, onFlush, onMsgCount]);
 
   // Fallback internal ref if caller did not supply one
   const _internalSpeechRef = useRef(0);
@@ -99,10 +109,13 @@ export function useWebSocket({ onStatus, onTranscript, onUserTranscript, onAudio
     let ws;
     let reconnectTimeout;
     let retryCount = 0;
+    // Issued by the server on every connect ({"type": "session"}); sent back
+    // on reconnect so a dropped connection resumes the same session.
+    let resumeToken = null;
 
     async function connectWebSocket() {
       try {
-        const wsUrl = await getWsUrl();
+        const wsUrl = withResumeToken(await getWsUrl(), resumeToken);
         ws = new window.WebSocket(wsUrl);
         wsRef.current = ws;
 
@@ -140,6 +153,30 @@ export function useWebSocket({ onStatus, onTranscript, onUserTranscript, onAudio
           const received = JSON.parse(message.data);
           if (received.type === "ping") return; // keep-alive
 
+          // ── Session handshake ─────────────────────────────────────────────────
+          if (received.type === "session") {
+            resumeToken = received.resume_token;
+            return;
+          }
+
+          // ── Server restarting ─────────────────────────────────────────────────
+          // The session was saved and ended; the 1012 close that follows
+          // reconnects to the next server instance as a fresh session.
+          if (received.type === "server_restart") {
+            resumeToken = null;
+            callbacksRef.current.onStatus("🔄 Server restarting — reconnecting…");
+            return;
+          }
+
+          // ── Barge-in ──────────────────────────────────────────────────────────
+          // The user talked over Lila — drop the sentence being assembled and
+          // everything already queued for playback.
+          if (received.type === "flush") {
+            ttsChunks = [];
+            callbacksRef.current.onFlush?.();
+            return;
+          }
+
           // ── Sentence start ────────────────────────────────────────────────────
           // Server sends this immediately before the first PCM chunk for a
           // sentence. Queue the caption now; audio will follow via tts_end.
@@ -214,7 +251,8 @@ export function useWebSocket({ onStatus, onTranscript, onUserTranscript, onAudio
     // Return cleanup
     return () => {
       retryCount = 99; // prevent reconnects
-      if (ws) ws.close();
+      // 1000 tells the server the session is over (no resume grace period)
+      if (ws) ws.close(1000);
       if (reconnectTimeout) clearTimeout(reconnectTimeout);
       stopRecording();
     };
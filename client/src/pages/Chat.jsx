@@ -41,7 +41,7 @@ export default function Chat() {
     setAiCaption("");
   }, []);
 
-  const { audioRef, push: pushAudio } = useAudioQueue({
+  const { audioRef, push: pushAudio, flush: flushAudio } = useAudioQueue({
     onPlay: handleAudioPlay,
     onEnd: handleAudioEnd,
   });
@@ -54,6 +54,13 @@ export default function Chat() {
     [pushAudio],
   );
 
+  const handleFlush = useCallback(() => {
+    // Barge-in — captions of the dropped sentences must not show up later.
+    captionQueueRef.current = [];
+    flushAudio();
+    setAiCaption("");
+  }, [flushAudio]);
+
   const handleTranscript = useCallback((text) => {
     // Enqueue — the audio chunk for this sentence is coming right after.
     // onPlay will dequeue exactly this caption when that chunk starts.
@@ -98,6 +105,7 @@ export default function Chat() {
     onTranscript: handleTranscript,
     onUserTranscript: handleUserTranscript,
     onAudio: handleAudio,
+    onFlush: handleFlush,
     onMsgCount: () => {},
     speechTimeRef: lastUserSpeechTime,
     enabled: !loading && isAuthenticated && isSessionStarted,
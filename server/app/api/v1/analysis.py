@@ -18,7 +18,7 @@ from app.services.analysis_service import (
     get_analyses_for_user,
     get_analysis_for_session,
 )
-import app.db.mongodb as mongodb
+from app.services.memory_mongo_service import get_session_header, iter_session_history
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
@@ -79,19 +79,15 @@ async def conversation_history(
     conversations collection. Used by History.jsx chat popup.
     Shape: { session_id, messages: [{role, content}] }
     """
-    db = mongodb.db
-    doc = await db["conversations"].find_one(
-        {"google_id": google_id, "session_id": session_id},
-        {"history": 1, "_id": 0},
-    )
-    if not doc:
+    header = await get_session_header(google_id, session_id)
+    if not header:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found",
         )
     messages = [
         {"role": m.get("role", "assistant"), "content": m.get("content", "").strip()}
-        for m in doc.get("history", [])
+        async for m in iter_session_history(google_id, session_id, header)
         if m.get("content", "").strip()
     ]
     return {"session_id": session_id, "messages": messages}
@@ -8,29 +8,62 @@ Memory architecture:
   - Current session messages live in RAM only (conversation_history,
     current_session_history).
   - Tier 3 imprints are loaded once at session start and passed to every
-    LLM call.
-  - On disconnect, Tier 1 is saved to DB, then the full post-session
-    pipeline fires (analysis → Tier 2 → Tier 3).
+    LLM call. Tier 2 memory prose is preloaded alongside them so recall
+    turns never wait on MongoDB.
+  - All session-start I/O (imprints, memories, TTS + STT sockets) runs
+    concurrently in _bootstrap_session; time-to-ready is recorded in the
+    session_ready_ms histogram.
+  - Sessions silent for SESSION_PARK_AFTER_S are parked: audio stops going
+    to Deepgram and the TTS socket returns to the pool until speech resumes.
+    Upstream time per session is counted in deepgram_upstream_seconds_total.
+  - The STT socket is supervised (STTStream): a mid-session drop reconnects
+    and replays buffered audio instead of ending the session.
+  - Tier 1 is written behind during the session (Tier1Persister: every few
+    turns or seconds). When a session ends the tail is saved, then the
+    post-session pipeline (analysis → Tier 2 → Tier 3) is queued as a
+    durable job (job_queue_service). A client-side drop (close 1001/1006)
+    instead suspends the session for SESSION_RESUME_GRACE_S under its resume
+    token (session_registry_service); a reconnect with ?resume=<token>
+    continues it, otherwise it is finished when the grace period expires.
+  - On shutdown (shutdown_service) new sessions are refused with 1012 and
+    live ones finish their current reply, are told {"type": "server_restart"}
+    and end like a clean close, so the client reconnects to the next instance.
 """
 import asyncio
 import json
+import time
+from collections import deque
 from datetime import datetime, timezone
 from uuid import uuid4
 
 import websockets
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from starlette.websockets import WebSocketState
 
 from app.core.config import settings
+from app.core.metrics import counter, gauge, histogram
+from app.core.turn_trace import TurnTrace
 from app.services.memory_mongo_service import (
+    get_all_memories_text,
     get_imprints_for_user,
-    save_session_history,
 )
 from app.core.security import decode_access_token
-from app.services.stt_service import connect_stt
-from app.services.tts_service import connect_tts, TTSSession
-from app.services.llm_service import send_llm_response
-from app.services.memory_pipeline_service import run_post_session_pipeline
+from app.services.client_sender_service import CaptionForwarder, ClientSender
+from app.services.deepgram_pool_service import acquire_stt, acquire_tts, release_tts
+from app.services.heartbeat_service import heartbeat
+from app.services.session_registry_service import SessionState, claim, discard, register, suspend
+from app.services.stt_service import STTStream
+from app.services.tier1_persister_service import Tier1Persister
+from app.services.tts_service import TTSSession
+from app.services.llm_service import SpeculativeTurn, send_llm_response
+from app.services.turn_taking_service import Endpointer, PauseProfile, completion_probability
+from app.services.user_service import get_pause_profile, save_pause_profile
+from app.services.memory_pipeline_service import enqueue_post_session_pipeline
+from app.services.shutdown_service import (
+    draining,
+    register_session,
+    time_left,
+    unregister_session,
+)
 
 router = APIRouter()
 
@@ -39,41 +72,181 @@ _active_connections: int = 0
 _connections_lock: asyncio.Lock = asyncio.Lock()
 
 # ── Semantic utterance gate ────────────────────────────────────────────────────
-# When speech_final fires, we check the last spoken word.
-# If it's in this set the user is almost certainly mid-sentence (pause to think,
-# breathe, or gather words). We start a silent-window timer instead of firing
-# the LLM immediately. If the user resumes speaking the timer resets. If the
-# timer expires they genuinely stopped, so we fire with whatever was accumulated.
-# Words NOT in this set → fire the LLM immediately, zero added latency.
-_OPEN_ENDINGS: frozenset[str] = frozenset({
-    # Conjunctions
-    "and", "but", "so", "or", "because", "although", "though", "while",
-    "if", "as", "since", "until", "unless", "whereas",
-    # Prepositions
-    "in", "at", "for", "with", "to", "about", "on", "of", "by", "from",
-    "into", "through", "before", "after", "above", "below", "between",
-    "among", "within", "without", "along", "across",
-    # Articles / determiners
-    "the", "a", "an", "this", "that", "these", "those",
-    "my", "your", "their", "our", "its", "his", "her",
-    "some", "any", "each", "every",
-    # Dangling pronouns / light verbs
-    "it", "they", "we", "he", "she", "i", "you",
-    "get", "is", "are", "was", "were", "have", "has", "had",
-    "do", "does", "did", "will", "would", "could", "should",
-    "can", "may", "might", "shall", "must", "be", "been", "being",
-    # Relative / interrogative openers
-    "which", "who", "whom", "where", "when", "how", "what",
-    # Common mid-sentence filler
-    "like", "just", "really", "very", "also", "even", "still",
-    "already", "then", "than", "now", "here", "there", "not",
-    "more", "most", "less", "few",
-})
-
-# Silent window after an open-ended speech_final (milliseconds).
-# Only applies when the user pauses on a dangling word — clean sentence
-# endings bypass this entirely and fire the LLM with zero delay.
-_UTTERANCE_WINDOW_MS: int = 1200
+# When speech_final fires, turn_taking_service.is_turn_complete() scores the
+# accumulated transcript. If the user is almost certainly mid-sentence (pause
+# to think, breathe, or gather words) we start a silent-window timer instead
+# of firing the LLM immediately. If the user resumes speaking the timer
+# resets. If the timer expires they genuinely stopped, so we fire with
+# whatever was accumulated. Complete turns fire immediately, zero added
+# latency. The window itself is learned per user (PauseProfile.window_ms).
+#
+# A user who starts speaking again within this long of the window running out
+# (or talks over the reply it started) was cut off mid-turn: the pause is
+# recorded as censored, at least the window, so the window can grow.
+_CUT_OFF_RESUME_MS = 1000
+
+
+# Client close codes that mean the connection dropped rather than ended:
+# 1001 (browser going away / network switch) and 1006 (no close frame).
+_RESUMABLE_CLOSE_CODES = {1001, 1006}
+
+gauge(
+    "ws_active_connections",
+    "Live /ws sessions",
+    fn=lambda: _active_connections,
+)
+
+
+def _rejected(reason: str):
+    return counter(
+        "ws_rejected_connections_total",
+        "/ws connections refused before the session started",
+        reason=reason,
+    )
+
+
+def _barge_in_ms(stage: str, trigger: str):
+    descriptions = {
+        "detect": "User speech onset (audio clock) until a barge-in was detected",
+        "stop": "Barge-in detected until the reply was cancelled, TTS cleared and the client told to flush",
+    }
+    return histogram(f"barge_in_{stage}_ms", descriptions[stage], trigger=trigger)
+
+
+def _upstream_seconds(kind: str):
+    return counter(
+        "deepgram_upstream_seconds_total",
+        "Seconds sessions held an upstream Deepgram resource (stt socket, stt audio streaming, tts socket)",
+        kind=kind,
+    )
+
+
+class _UpstreamClock:
+    """Accumulates how long one upstream resource was held during a session."""
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self._since: float | None = None
+
+    def start(self) -> None:
+        if self._since is None:
+            self._since = time.monotonic()
+
+    def stop(self) -> None:
+        if self._since is not None:
+            self.seconds += time.monotonic() - self._since
+            self._since = None
+
+
+_session_ready_ms = histogram(
+    "session_ready_ms",
+    "Time from WebSocket accept until the session is ready for audio",
+)
+
+
+async def _bootstrap_session(google_id: str, load_context: bool = True) -> tuple:
+    """
+    Run every independent piece of session-start I/O concurrently and time
+    each step (session_bootstrap_step_ms{step=...}).
+
+    Returns (user_imprints, memories_text, pause_profile, tts_ws, stt_ws, timings).
+    Imprint / memory failures are logged and degrade to empty values;
+    a Deepgram failure raises RuntimeError after closing any socket that
+    did connect. With load_context=False (a resumed session already holds
+    its context) only the Deepgram sockets are opened.
+    """
+    timings: dict[str, float] = {}
+
+    async def _timed(step: str, coro):
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            timings[step] = elapsed_ms
+            histogram(
+                "session_bootstrap_step_ms",
+                "Duration of each session bootstrap step",
+                step=step,
+            ).observe(elapsed_ms)
+
+    async def _skipped():
+        return None
+
+    imprints_doc, memories_text, pause_doc, tts_ws, stt_ws = await asyncio.gather(
+        _timed("imprints", get_imprints_for_user(google_id)) if load_context else _skipped(),
+        _timed("memories", get_all_memories_text(google_id)) if load_context else _skipped(),
+        _timed("pause_profile", get_pause_profile(google_id)) if load_context else _skipped(),
+        _timed("tts", acquire_tts()),
+        _timed("stt", acquire_stt()),
+        return_exceptions=True,
+    )
+
+    # Tier 3 — loaded once, injected into every LLM call
+    user_imprints: list = []
+    if isinstance(imprints_doc, BaseException):
+        print(f"⚠️  Failed to load imprints: {imprints_doc}")
+    elif imprints_doc is not None:
+        user_imprints = [
+            p.model_dump() if hasattr(p, "model_dump") else p
+            for p in imprints_doc.points
+        ]
+        if user_imprints:
+            print(f"📌 Loaded {len(user_imprints)} imprints for user {google_id}")
+
+    # Tier 2 — preloaded so keyword-triggered recall needs no DB round trip
+    if isinstance(memories_text, BaseException):
+        print(f"⚠️  Failed to preload memories: {memories_text}")
+        memories_text = None
+
+    # Utterance-gate calibration carried over from previous sessions
+    if isinstance(pause_doc, BaseException):
+        print(f"⚠️  Failed to load pause profile: {pause_doc}")
+        pause_doc = None
+    pause_profile = PauseProfile.from_doc(pause_doc)
+
+    failures = [ws for ws in (tts_ws, stt_ws) if isinstance(ws, BaseException)]
+    if failures:
+        for ws in (tts_ws, stt_ws):
+            if not isinstance(ws, BaseException):
+                try:
+                    await ws.close()
+                except Exception:
+                    pass
+        raise RuntimeError(str(failures[0]))
+
+    return user_imprints, memories_text, pause_profile, tts_ws, stt_ws, timings
+
+
+async def _finish_session(state: SessionState) -> None:
+    """
+    End of a session for good: save Tier 1 and queue the post-session
+    pipeline. Runs on a clean close, or when a suspended session's resume
+    grace period expires.
+    """
+    state.persister.stop()
+    # Only trigger if the user actually spoke (session has messages).
+    if not (state.google_id and state.session_id and state.current_session_history):
+        return
+    # Step 1: Write the Tier 1 tail — MUST complete before pipeline reads it.
+    # Earlier turns were already written behind during the session.
+    if await state.persister.flush():
+        print(
+            f"💾 Tier 1 saved to MongoDB for user {state.google_id} "
+            f"(session {state.session_id[:8]}… | {len(state.current_session_history)} messages)"
+        )
+    else:
+        print("❌ Tier 1 save failed")
+
+    # Steps 2-4: Analysis → Tier 2 → Tier 3, as a durable job that a worker
+    # (this process or worker.py) picks up
+    try:
+        await enqueue_post_session_pipeline(
+            state.google_id, state.session_id, state.session_started_at,
+        )
+        print(f"🧠 Post-session pipeline queued for session {state.session_id[:8]}…")
+    except Exception as e:
+        print(f"❌ Post-session pipeline could not be queued: {e}")
 
 
 async def _decrement_connections() -> int:
@@ -88,6 +261,14 @@ async def websocket_endpoint(websocket: WebSocket):
     global _active_connections
 
     await websocket.accept()
+    accepted_at = time.perf_counter()
+
+    # Shutting down — the client reconnects (any close but 1000) elsewhere
+    if draining():
+        _rejected("draining").inc()
+        await websocket.send_text(json.dumps({"error": "Server restarting"}))
+        await websocket.close(code=1012)  # Service Restart
+        return
 
     # Auth strategy:
     # 1. Try HttpOnly cookie (dev environment, or same-origin prod)
@@ -102,6 +283,7 @@ async def websocket_endpoint(websocket: WebSocket):
         token = query_params.get("token")
     
     if not token:
+        _rejected("unauthenticated").inc()
         await websocket.send_text(json.dumps({"error": "Not authenticated"}))
         await websocket.close()
         return
@@ -113,6 +295,7 @@ async def websocket_endpoint(websocket: WebSocket):
             raise Exception("No google_id in token")
     except Exception as auth_err:
         print(f"🔐 Auth failed: {auth_err}")
+        _rejected("invalid_token").inc()
         await websocket.send_text(json.dumps({"error": "Invalid or missing authentication"}))
         await websocket.close()
         return
@@ -122,6 +305,7 @@ async def websocket_endpoint(websocket: WebSocket):
     # increment and push the count past the ceiling.
     async with _connections_lock:
         if _active_connections >= settings.MAX_CONCURRENT_CONNECTIONS:
+            _rejected("capacity").inc()
             await websocket.send_text(json.dumps({"error": "Too many connections. Please wait."}))
             await websocket.close()
             return
@@ -129,7 +313,13 @@ async def websocket_endpoint(websocket: WebSocket):
         active = _active_connections
     print(f"✅ Client connected (active: {active})")
 
-    # Each WebSocket connection is its own session
+    # A reconnect inside the grace period continues its suspended session
+    resumed: SessionState | None = None
+    resume_token = websocket.query_params.get("resume")
+    if resume_token and settings.SESSION_RESUME_GRACE_S > 0:
+        resumed = await claim(resume_token, google_id)
+
+    # Otherwise each WebSocket connection is its own session
     session_id: str = str(uuid4())
     session_started_at: datetime = datetime.now(timezone.utc)
 
@@ -137,34 +327,85 @@ async def websocket_endpoint(websocket: WebSocket):
     conversation_history: list = []            # fed to LLM — current session only
     current_session_history: list = []         # mirror for DB persistence at end
 
-    # Tier 3 — load imprints once, inject into every LLM call
     user_imprints: list = []
-    try:
-        imprints_doc = await get_imprints_for_user(google_id)
-        user_imprints = [
-            p.model_dump() if hasattr(p, "model_dump") else p
-            for p in imprints_doc.points
-        ]
-        if user_imprints:
-            print(f"📌 Loaded {len(user_imprints)} imprints for user {google_id}")
-    except Exception as e:
-        print(f"⚠️  Failed to load imprints: {e}")
-
+    memories_text: str | None = None
+    pause_profile: PauseProfile | None = None
+    if resumed is not None:
+        session_id = resumed.session_id
+        session_started_at = resumed.session_started_at
+        conversation_history = resumed.conversation_history
+        current_session_history = resumed.current_session_history
+        user_imprints = resumed.user_imprints
+        memories_text = resumed.memories_text
+        pause_profile = resumed.pause_profile
+        persister = resumed.persister
+    else:
+        # Tier 1 is written incrementally while the session runs
+        persister = Tier1Persister(
+            google_id, session_id, session_started_at, current_session_history,
+        )
     latest_user_input: str = ""
     current_task: asyncio.Task | None = None
-    tts_ws = None
-    # Per-connection TTS session — isolates lock/state from other users
-    tts_session = TTSSession()
+    # Per-connection TTS session — isolates lock/state from other users and
+    # owns the TTS socket (reconnects go through the warm pool)
+    tts_session = TTSSession(acquire_tts)
+    # Everything sent to the browser after bootstrap goes through this queue
+    sender = ClientSender(websocket)
+    captions = CaptionForwarder(sender)
+    # Upstream connection time for this session (see the idle policy below)
+    upstream = {kind: _UpstreamClock() for kind in ("stt", "stt_streaming", "tts")}
+    # Resume token for this connection; a newer connection presenting it
+    # while this one is still up sets `taken_over` and this one suspends.
+    taken_over = asyncio.Event()
+    token = register(google_id, taken_over.set)
+    client_close_code: int | None = None
+    server_closed = False                      # we closed the socket ourselves
+    # Set when the server starts draining for shutdown (shutdown_service)
+    drained = asyncio.Event()
+    register_session(drained.set)
 
     try:
-        # ── Connect to Deepgram ───────────────────────────────────────────────
+        # ── Bootstrap: imprints, memories and Deepgram sockets in parallel ───
         try:
-            tts_ws = await connect_tts()
-            stt_ws = await connect_stt()
+            (
+                loaded_imprints,
+                loaded_memories,
+                loaded_profile,
+                tts_ws,
+                stt_ws,
+                timings,
+            ) = await _bootstrap_session(google_id, load_context=resumed is None)
         except RuntimeError as e:
             await websocket.send_text(json.dumps({"error": str(e)}))
             await websocket.close()
             return
+        if resumed is None:
+            user_imprints, memories_text, pause_profile = (
+                loaded_imprints, loaded_memories, loaded_profile,
+            )
+        tts_session.attach(tts_ws)
+        sender.start()
+        persister.start()
+        for clock in upstream.values():
+            clock.start()
+        await sender.send_text(json.dumps({
+            "type": "session",
+            "resume_token": token,
+            "resumed": resumed is not None,
+        }))
+        if resumed is not None:
+            print(
+                f"♻️  Resumed session {session_id[:8]}… "
+                f"({len(current_session_history)} messages kept)"
+            )
+
+        ready_ms = (time.perf_counter() - accepted_at) * 1000
+        _session_ready_ms.observe(ready_ms)
+        print(
+            f"⏱️  Session ready in {ready_ms:.0f} ms ("
+            + ", ".join(f"{step} {ms:.0f}" for step, ms in timings.items())
+            + ")"
+        )
 
         # ── Inner coroutines ──────────────────────────────────────────────────
         # Hard cap on inbound binary frames.  A malicious client sending
@@ -173,21 +414,98 @@ async def websocket_endpoint(websocket: WebSocket):
         # typically 2-8 KB; 1 MB is many orders of magnitude above any
         # legitimate frame and safely catches abuse or misconfiguration.
         _MAX_AUDIO_BYTES = 1 * 1024 * 1024  # 1 MB
+        # Deepgram closes an STT stream after ~10 s without data; the session
+        # heartbeat sends KeepAlive once no audio has gone upstream for this long.
+        _STT_KEEPALIVE_IDLE_S = 2.5
+
+        # Browser chunks replayed to Deepgram when a parked session resumes
+        # (~1 s at the client's 100 ms MediaRecorder timeslice), so the
+        # onset of the speech that woke it up is transcribed too.
+        _PARK_REPLAY_CHUNKS = 10
+        # A parked chunk this many times the running noise floor is speech
+        _PARK_RESUME_RATIO = 2.0
+
+        # Liveness bookkeeping read by the shared heartbeat (time.monotonic())
+        last_client_audio_at = time.monotonic()
+        last_stt_audio_at = last_client_audio_at
+        last_transcript_at = last_client_audio_at
+
+        # ── Idle policy ───────────────────────────────────────────────────────
+        # After SESSION_PARK_AFTER_S without a transcript the session parks:
+        # browser audio is no longer forwarded (the heartbeat keeps the STT
+        # socket open with KeepAlive) and the TTS socket goes back to the warm
+        # pool. The next chunk that looks like speech (Opus is VBR, so speech
+        # chunks are much larger than silence) resumes both transparently.
+        parked = False
+        parked_floor: float | None = None       # EWMA of parked chunk sizes
+        recent_audio: deque[bytes] = deque(maxlen=_PARK_REPLAY_CHUNKS)
+        parking: asyncio.Task | None = None     # park() in flight
+
+        async def park(idle_s: float) -> None:
+            # Runs as its own task, not inside the timed heartbeat beat, so a
+            # beat timeout cannot stop it half-way; the session only counts
+            # as parked once the TTS socket is back in the pool.
+            nonlocal parked, parked_floor
+            released = await tts_session.detach()
+            if released is not None:
+                upstream["tts"].stop()
+                await release_tts(released)
+            upstream["stt_streaming"].stop()
+            parked, parked_floor = True, None
+            recent_audio.clear()
+            print(f"🅿️  Session {session_id[:8]} parked after {idle_s:.0f}s without speech")
+
+        def unpark() -> None:
+            nonlocal parked, last_transcript_at
+            parked = False
+            last_transcript_at = time.monotonic()
+            upstream["stt_streaming"].start()
+            # The next sentence waits on this connect if it is still running
+            tts_session.prepare()
+            upstream["tts"].start()
+            print(f"▶️  Session {session_id[:8]} resumed (replaying {len(recent_audio)} chunks)")
+
+        def _sounds_like_speech(size: int) -> bool:
+            nonlocal parked_floor
+            floor = parked_floor if parked_floor is not None else size
+            if size >= max(settings.SESSION_PARK_RESUME_MIN_BYTES, floor * _PARK_RESUME_RATIO):
+                return True
+            parked_floor = 0.9 * floor + 0.1 * size
+            return False
 
         async def receive_audio():
             """Forward raw audio bytes from browser → Deepgram STT."""
+            nonlocal last_client_audio_at, last_stt_audio_at, client_close_code, server_closed
             try:
-                async for message in websocket.iter_bytes():
+                while True:
+                    frame = await websocket.receive()
+                    if frame["type"] == "websocket.disconnect":
+                        # 1001 / 1006 = dropped (resumable), others ended it
+                        client_close_code = frame.get("code", 1000)
+                        return
+                    message = frame.get("bytes")
                     if not message:
                         continue
+                    last_client_audio_at = time.monotonic()
                     if len(message) > _MAX_AUDIO_BYTES:
                         print(
                             f"\u26a0\ufe0f  Oversized audio frame ({len(message):,} bytes) "
                             f"from {google_id} \u2014 closing connection (1009)"
                         )
+                        server_closed = True
                         await websocket.close(code=1009)  # RFC 6455: Message Too Big
                         return
-                    await deepgram_ws.send(message)
+                    if parked:
+                        recent_audio.append(message)
+                        if not _sounds_like_speech(len(message)):
+                            continue
+                        unpark()
+                        for chunk in recent_audio:
+                            await stt.send(chunk)
+                        recent_audio.clear()
+                    else:
+                        await stt.send(message)
+                    last_stt_audio_at = last_client_audio_at
             except websockets.exceptions.ConnectionClosed:
                 print("\U0001f6aa Frontend closed audio stream")
             except Exception as e:
@@ -197,28 +515,82 @@ async def websocket_endpoint(websocket: WebSocket):
             """Read STT results and trigger LLM responses.
 
             Utterance gate logic:
-              speech_final arrives
-                └─ last word in _OPEN_ENDINGS?
-                     YES → accumulate, cancel old timer, start fresh 1.2 s timer
-                           timer fires → LLM (safety net for genuine pauses on open words)
-                           new speech_final before timer → reset timer
-                     NO  → cancel timer, fire LLM immediately (zero extra latency)
-
-            Barge-in on any speech_final:
-              If Lila is currently responding, she is always cancelled immediately
-              regardless of whether we fire the LLM now or start the timer.
+              speech_final (or UtteranceEnd with ungated text) arrives
+                └─ completion model says the turn is complete?
+                     NO  → keep accumulating and wait for the user's learned
+                           window (PauseProfile) of real trailing silence
+                           window of silence reached → LLM (safety net for
+                           genuine pauses on open words)
+                           user speaks again before then → stop waiting
+                     YES → fire LLM immediately (zero extra latency)
+
+            Endpointing on the audio clock:
+              Silence is measured from Deepgram word timestamps — the end of
+              the last word vs. how far into the stream Deepgram has
+              transcribed (Endpointer). Every result re-checks the gap, so
+              the gate fires as soon as the user's audio holds a window of
+              silence; the fallback timer only sleeps the part of the window
+              not already observed, so network jitter is not added on top.
+
+            Barge-in:
+              While Lila is responding (or her audio is still playing on the
+              client), an interim result with BARGE_IN_MIN_WORDS words or
+              BARGE_IN_MIN_SPEECH_MS of speech interrupts her: the client is
+              told to flush its playback queue, the reply task is cancelled
+              and Deepgram TTS gets `Clear`. Any speech_final that arrives
+              while she is still talking does the same.
+
+            Speculation (LLM_SPECULATIVE):
+              An interim transcript that stays unchanged for a few results and
+              already scores as a complete turn starts the Groq request early.
+              The gate's final input commits it if the text matches; any
+              divergence discards it.
+
+            Calibration:
+              When the gate waits on an incomplete segment and the user
+              resumes before the LLM fires, the gap between the segment's
+              last word and the first word of the next final segment is fed
+              to PauseProfile. When the window runs out first and the user
+              resumes within _CUT_OFF_RESUME_MS of it, or barges in on the
+              reply it started, the pause is fed as censored (>= window).
             """
-            nonlocal latest_user_input, current_task
+            nonlocal latest_user_input, current_task, last_transcript_at
 
             # The pending utterance-window timer task. Sits here for the
             # lifetime of this coroutine; the async for loop manages it.
             pending_timer_task: asyncio.Task | None = None
-
-            async def _fire_llm() -> None:
-                """Spawn a new LLM response task for the accumulated input."""
-                nonlocal latest_user_input, current_task
+            # Latency trace for the turn being accumulated — restarted on
+            # every gated segment so the origin is the user's last segment.
+            turn_trace: TurnTrace | None = None
+            # End (audio seconds) of the last word before a segment the gate
+            # judged incomplete — the start of a potential mid-turn pause.
+            # Cleared once the LLM fires: the gap before the next turn is a
+            # reply to Lila, not a pause.
+            pause_started_at: float | None = None
+            # (pause_started_at, window ms) of a pause the window cut short —
+            # kept until the user next speaks, to learn it as censored.
+            cut_off: tuple[float, int] | None = None
+            endpointer = Endpointer()
+            stt_generation = 0
+            # In-flight speculative completion and the interim it was started on
+            speculation: SpeculativeTurn | None = None
+            stable_interim, stable_count = "", 0
+
+            async def _fire_llm(window_ms: int | None = None) -> None:
+                """Spawn a new LLM response task for the accumulated input.
+                `window_ms` is set when the silent window ran out.
+                """
+                nonlocal latest_user_input, current_task, turn_trace, speculation
+                nonlocal pause_started_at, cut_off
                 if not latest_user_input.strip():
                     return
+                if window_ms is not None and pause_started_at is not None:
+                    cut_off = (pause_started_at, window_ms)
+                else:
+                    cut_off = None
+                pause_started_at = None
+                trace, turn_trace = turn_trace or TurnTrace(), None
+                trace.mark("gate_decision")
                 # Cancel Lila's current response if still running
                 if current_task and not current_task.done():
                     print("🛑 Barge-in — cancelling previous response")
@@ -229,128 +601,318 @@ async def websocket_endpoint(websocket: WebSocket):
                         pass
                 captured = latest_user_input.strip()
                 latest_user_input = ""
+                spec, speculation = speculation, None
                 print(f"👤 User → LLM: '{captured}'")
                 current_task = asyncio.create_task(
                     send_llm_response(
                         captured,
-                        websocket,
+                        sender,
                         conversation_history,
                         current_session_history,
-                        tts_ws,
                         tts_session,
                         google_id,
                         user_imprints,
+                        memories_text,
+                        trace,
+                        spec,
                     )
                 )
+                # The finished turn is in current_session_history — write-behind
+                current_task.add_done_callback(lambda _: persister.notify())
+                if spec is not None:
+                    # Cancelled before send_llm_response judged it (no-op after)
+                    current_task.add_done_callback(lambda _: spec.discard("abandoned"))
+
+            def _lila_speaking() -> bool:
+                return bool(current_task and not current_task.done()) or tts_session.audible
+
+            async def _barge_in(trigger: str, onset: float | None) -> None:
+                """Stop Lila now — client playback first, then the reply and TTS."""
+                detected = time.perf_counter()
+                if onset is not None:
+                    _barge_in_ms("detect", trigger).observe(
+                        max(0.0, (endpointer.audio_cursor - onset) * 1000)
+                    )
+                # Cancelling the reply sends Deepgram `Clear` (TTSPipeline);
+                # sends never block, so this returns almost at once.
+                if current_task and not current_task.done():
+                    current_task.cancel()
+                    try:
+                        await current_task
+                    except asyncio.CancelledError:
+                        pass
+                # Drop audio still queued for the client and jump the queue so
+                # sentences already on the client stop playing right away
+                sender.interrupt(json.dumps({"type": "flush"}))
+                tts_session.playback_until = 0.0
+                stop_ms = (time.perf_counter() - detected) * 1000
+                _barge_in_ms("stop", trigger).observe(stop_ms)
+                print(f"🛑 Barge-in ({trigger}) — Lila stopped in {stop_ms:.0f} ms")
+
+            def _waiting() -> bool:
+                return pending_timer_task is not None and not pending_timer_task.done()
+
+            def _stop_waiting() -> None:
+                nonlocal pending_timer_task
+                if _waiting():
+                    pending_timer_task.cancel()
+                pending_timer_task = None
 
             async def _utterance_timer() -> None:
-                """Wait for the silent window then fire the LLM.
+                """Wait out the rest of the silent window, then fire the LLM.
                 Cancelled silently if the user resumes speaking first.
                 """
                 try:
-                    await asyncio.sleep(_UTTERANCE_WINDOW_MS / 1000)
+                    window_ms = pause_profile.window_ms()
+                    remaining_ms = window_ms - endpointer.silence_ms
+                    if remaining_ms > 0:
+                        await asyncio.sleep(remaining_ms / 1000)
                     print(f"👤 User (window elapsed — firing): '{latest_user_input.strip()}'")
-                    await _fire_llm()
+                    await _fire_llm(window_ms)
                 except asyncio.CancelledError:
                     pass  # user kept speaking — normal, ignore
 
-            async for raw in deepgram_ws:
-                try:
-                    data = json.loads(raw)
-
-                    if data.get("type") == "Metadata":
-                        continue
+            async def _maybe_speculate(interim: str) -> None:
+                """Start the LLM early once a predicted-final interim is stable."""
+                nonlocal speculation, stable_interim, stable_count
+                candidate = f"{latest_user_input} {interim}".strip()
+                if speculation is not None:
+                    if speculation.matches(candidate):
+                        return
+                    # User kept talking or the transcript was revised
+                    speculation.discard()
+                    speculation = None
+
+                if candidate == stable_interim:
+                    stable_count += 1
+                else:
+                    stable_interim, stable_count = candidate, 1
+                if stable_count < settings.LLM_SPECULATIVE_STABLE_RESULTS:
+                    return
+                # The reply in progress will still change the history
+                if current_task and not current_task.done():
+                    return
+                if completion_probability(candidate) < settings.TURN_COMPLETE_THRESHOLD:
+                    return
+                print(f"🔮 Speculating on interim: '{candidate}'")
+                speculation = await SpeculativeTurn.start(
+                    candidate,
+                    conversation_history,
+                    google_id,
+                    user_imprints,
+                    memories_text,
+                )
 
-                    if "channel" in data and "alternatives" in data["channel"]:
-                        transcript = (
-                            data["channel"]["alternatives"][0]
-                            .get("transcript", "")
-                            .strip()
-                        )
-                        if not transcript:
-                            continue
+            async def _gate(transcript: str, onset: float | None = None) -> None:
+                """End of a speech segment: fire now or wait for silence."""
+                nonlocal pending_timer_task, turn_trace, pause_started_at
+                turn_trace = TurnTrace()
+
+                # Barge-in the interim detector missed (e.g. a single short word):
+                # stop Lila whether we fire the LLM now or after the window.
+                if _lila_speaking():
+                    await _barge_in("speech_final", onset)
+
+                # Score the whole turn so far to decide open vs. closed ending
+                p_complete = completion_probability(latest_user_input)
+                _stop_waiting()
+
+                if p_complete < settings.TURN_COMPLETE_THRESHOLD:
+                    # Mid-sentence pause — wait for real silence, do NOT fire LLM yet
+                    print(f"👤 User (open, waiting): '{transcript}' [p={p_complete:.2f}]")
+                    pause_started_at = endpointer.last_word_end
+                    pending_timer_task = asyncio.create_task(_utterance_timer())
+                else:
+                    # Clean sentence end — fire LLM now
+                    print(f"👤 User (closed, firing): '{transcript}' [p={p_complete:.2f}]")
+                    await _fire_llm()
 
-                        is_final = data.get("is_final", False)
-                        speech_final = data.get("speech_final", False)
+            try:
+                async for raw in stt.results():
+                    try:
+                        data = json.loads(raw)
 
-                        # Forward all transcript events to the browser for live captions
-                        if websocket.client_state != WebSocketState.DISCONNECTED:
-                            await websocket.send_text(
-                                json.dumps({"transcript": transcript, "is_final": is_final})
-                            )
+                        if data.get("type") == "Metadata":
+                            continue
 
-                        if not speech_final:
+                        if data.get("type") == "UtteranceEnd":
+                            # Deepgram's fallback end-of-speech signal, sent when
+                            # background noise kept speech_final from firing.
+                            if latest_user_input.strip() and not _waiting():
+                                await _gate(latest_user_input.strip())
                             continue
 
-                        # Accumulate the confirmed segment
-                        latest_user_input += " " + transcript
-
-                        # Immediate barge-in: stop Lila as soon as the user speaks,
-                        # regardless of whether we fire the LLM now or after the timer.
-                        if current_task and not current_task.done():
-                            print("🛑 Barge-in — stopping Lila")
-                            current_task.cancel()
-                            try:
-                                await current_task
-                            except asyncio.CancelledError:
-                                pass
-
-                        # Inspect the last word to decide open vs. closed ending
-                        words = transcript.split()
-                        last_word = words[-1].lower().rstrip(",.;:!?") if words else ""
-
-                        if last_word in _OPEN_ENDINGS:
-                            # Mid-sentence pause — reset timer, do NOT fire LLM yet
-                            print(f"👤 User (open, waiting): '{transcript}' [last={last_word!r}]")
-                            if pending_timer_task and not pending_timer_task.done():
-                                pending_timer_task.cancel()
-                            pending_timer_task = asyncio.create_task(_utterance_timer())
-                        else:
-                            # Clean sentence end — cancel timer, fire LLM now
-                            print(f"👤 User (closed, firing): '{transcript}' [last={last_word!r}]")
-                            if pending_timer_task and not pending_timer_task.done():
-                                pending_timer_task.cancel()
-                                pending_timer_task = None
-                            await _fire_llm()
-
-                    elif "error" in data:
-                        print(f"❌ Deepgram error: {data['error']}")
-                        if websocket.client_state != WebSocketState.DISCONNECTED:
-                            await websocket.send_text(
+                        if "channel" in data and "alternatives" in data["channel"]:
+                            # New STT socket after a drop — map its clock onto ours
+                            if stt.generation != stt_generation:
+                                stt_generation = stt.generation
+                                endpointer.offset = stt.clock_offset
+                            # Every result — even an empty one — advances the audio clock
+                            spoken_words = endpointer.observe(data)
+                            if data.get("is_final") and data.get("duration") is not None:
+                                final_end = data["start"] + data["duration"]
+                                if final_end <= stt.finalized_until:
+                                    continue  # replayed audio Deepgram already finalized
+                                stt.finalize(final_end)
+                            if _waiting():
+                                window_ms = pause_profile.window_ms()
+                                if spoken_words:
+                                    # User resumed — the next segment end re-gates
+                                    _stop_waiting()
+                                elif endpointer.silence_ms >= window_ms:
+                                    _stop_waiting()
+                                    print(
+                                        f"👤 User (silence {endpointer.silence_ms:.0f} ms — firing): "
+                                        f"'{latest_user_input.strip()}'"
+                                    )
+                                    await _fire_llm(window_ms)
+
+                            transcript = (
+                                data["channel"]["alternatives"][0]
+                                .get("transcript", "")
+                                .strip()
+                            )
+                            if not transcript:
+                                continue
+                            last_transcript_at = time.monotonic()
+
+                            is_final = data.get("is_final", False)
+                            speech_final = data.get("speech_final", False)
+
+                            # First words after the window cut a pause short: learn
+                            # it as censored if they came right away or over Lila
+                            if spoken_words and cut_off is not None:
+                                cut_at, cut_window_ms = cut_off
+                                cut_off = None
+                                gap_ms = (spoken_words[0]["start"] - cut_at) * 1000
+                                if gap_ms < cut_window_ms + _CUT_OFF_RESUME_MS or _lila_speaking():
+                                    pause_profile.observe_censored(cut_window_ms)
+
+                            # Interrupt Lila as soon as the user clearly talks over her
+                            if spoken_words and not speech_final and _lila_speaking():
+                                speech_ms = (spoken_words[-1]["end"] - spoken_words[0]["start"]) * 1000
+                                if (
+                                    len(spoken_words) >= settings.BARGE_IN_MIN_WORDS
+                                    or speech_ms >= settings.BARGE_IN_MIN_SPEECH_MS
+                                ):
+                                    await _barge_in(
+                                        "final" if is_final else "interim",
+                                        spoken_words[0]["start"],
+                                    )
+
+                            # User resumed after a gated segment — learn the pause
+                            if is_final and spoken_words and pause_started_at is not None:
+                                pause_profile.observe(
+                                    (spoken_words[0]["start"] - pause_started_at) * 1000
+                                )
+                                pause_started_at = None
+
+                            # Live captions — interim text coalesced, finals immediate
+                            if is_final:
+                                await captions.final(transcript)
+                            else:
+                                await captions.interim(transcript)
+
+                            if not is_final:
+                                if settings.LLM_SPECULATIVE:
+                                    await _maybe_speculate(transcript)
+                                continue
+
+                            # Accumulate every finalized segment, gate at speech_final
+                            latest_user_input += " " + transcript
+                            if speech_final:
+                                await _gate(
+                                    transcript,
+                                    spoken_words[0]["start"] if spoken_words else None,
+                                )
+
+                        elif "error" in data:
+                            print(f"❌ Deepgram error: {data['error']}")
+                            await sender.send_text(
                                 json.dumps({"error": f"STT error: {data['error']}"})
                             )
 
-                except Exception as e:
-                    print(f"❌ Transcription error: {e}")
-
-        async def keep_alive():
-            """Ping client every 30 s to prevent proxy timeouts."""
-            try:
-                while True:
-                    await asyncio.sleep(30)
-                    if websocket.client_state != WebSocketState.DISCONNECTED:
-                        await websocket.send_text(json.dumps({"type": "ping"}))
-            except Exception:
-                pass
+                    except Exception as e:
+                        print(f"❌ Transcription error: {e}")
+            finally:
+                # Session over — stop any completion nobody will commit and
+                # a pending utterance window that would still fire one
+                _stop_waiting()
+                if speculation is not None:
+                    speculation.discard("abandoned")
+                captions.close()
+
+        async def session_heartbeat() -> bool:
+            """
+            Beat on the shared heartbeat wheel (replaces a per-connection
+            keep-alive task). Browser liveness at the protocol level is
+            uvicorn's WebSocket ping; this closes browsers that stopped
+            streaming audio, keeps an idle upstream STT socket open and
+            parks the session once it has been silent long enough.
+            """
+            nonlocal parking
+            now = time.monotonic()
+            if now - last_client_audio_at > settings.WS_CLIENT_IDLE_TIMEOUT_S:
+                print(f"💤 No audio from {google_id} for {now - last_client_audio_at:.0f}s — closing")
+                nonlocal server_closed
+                server_closed = True
+                try:
+                    await websocket.close(code=1001)  # Going Away
+                except Exception:
+                    pass
+                return False
+            if now - last_stt_audio_at >= _STT_KEEPALIVE_IDLE_S:
+                await stt.send_control(json.dumps({"type": "KeepAlive"}))
+            idle_s = now - last_transcript_at
+            if (
+                settings.SESSION_PARK_AFTER_S > 0
+                and not parked
+                and (parking is None or parking.done())
+                and idle_s >= settings.SESSION_PARK_AFTER_S
+                and not latest_user_input.strip()
+                and not (current_task and not current_task.done())
+                and not tts_session.audible
+            ):
+                parking = asyncio.create_task(park(idle_s), name=f"park-{session_id[:8]}")
+            return True
 
         # ── Run pipeline ──────────────────────────────────────────────────────
-        async with stt_ws as deepgram_ws:
-            keep_alive_task = asyncio.create_task(keep_alive())
+        async with STTStream(stt_ws, acquire_stt) as stt:
+            beat = heartbeat.register(
+                session_heartbeat,
+                settings.SESSION_HEARTBEAT_S,
+                name=f"ws-{session_id[:8]}",
+            )
             audio_task = asyncio.create_task(receive_audio())
             tx_task = asyncio.create_task(process_transcription())
+            takeover_task = asyncio.create_task(taken_over.wait())
+            drain_task = asyncio.create_task(drained.wait())
             try:
-                # Wait for whichever finishes first (e.g., client disconnects)
+                # Wait for whichever finishes first (e.g., client disconnects,
+                # a reconnect of the same client takes the session over, or
+                # the server is shutting down)
                 await asyncio.wait(
-                    [audio_task, tx_task], return_when=asyncio.FIRST_COMPLETED
+                    [audio_task, tx_task, takeover_task, drain_task],
+                    return_when=asyncio.FIRST_COMPLETED,
                 )
+                if drained.is_set() and not audio_task.done():
+                    # Let Lila finish the reply she is giving, then say goodbye
+                    if current_task is not None and not current_task.done():
+                        await asyncio.wait([current_task], timeout=time_left())
+                    await sender.send_text(json.dumps({"type": "server_restart"}))
             finally:
-                keep_alive_task.cancel()
+                beat.cancel()
+                # A park in progress finishes returning its socket to the pool
+                if parking is not None:
+                    await asyncio.gather(parking, return_exceptions=True)
                 audio_task.cancel()
                 tx_task.cancel()
-                try:
-                    await keep_alive_task
-                except asyncio.CancelledError:
-                    pass
+                takeover_task.cancel()
+                drain_task.cancel()
+                # Let process_transcription's cleanup (utterance timer) run
+                await asyncio.gather(
+                    audio_task, tx_task, takeover_task, drain_task, return_exceptions=True,
+                )
 
     except WebSocketDisconnect:
         print("🚪 Client disconnected normally")
@@ -358,40 +920,69 @@ async def websocket_endpoint(websocket: WebSocket):
         print(f"❌ WebSocket error: {e}")
     finally:
         active = await _decrement_connections()
-        if tts_ws:
+        # Stop a reply still in flight: once the state is handed to the
+        # registry (or a connection taking it over) nothing may append to
+        # the history or write to this socket.
+        if current_task is not None and not current_task.done():
+            current_task.cancel()
+            await asyncio.gather(current_task, return_exceptions=True)
+        state = SessionState(
+            google_id,
+            session_id,
+            session_started_at,
+            conversation_history,
+            current_session_history,
+            user_imprints,
+            memories_text,
+            pause_profile,
+            persister,
+        )
+        # Dropped by the network rather than ended — keep it resumable for a
+        # while; the registry finishes it if the client does not come back.
+        # Done first so a reconnect that is taking this session over is not
+        # kept waiting on the cleanup below. Sessions the server closed
+        # itself (idle, oversized frame, error) and drained sessions, whose
+        # resume token dies with this process, end for good.
+        resumable = settings.SESSION_RESUME_GRACE_S > 0 and not drained.is_set() and (
+            taken_over.is_set()
+            or (not server_closed and client_close_code in _RESUMABLE_CLOSE_CODES)
+        )
+        persister.stop()
+        if resumable:
+            suspend(token, state, _finish_session)
+        await sender.close()
+        if drained.is_set():
             try:
-                await tts_ws.close()
+                await websocket.close(code=1012)  # Service Restart — client reconnects
             except Exception:
                 pass
+        await tts_session.close()
+        for kind, clock in upstream.items():
+            clock.stop()
+            _upstream_seconds(kind).inc(clock.seconds)
+        if upstream["stt"].seconds:
+            print(
+                "📊 Upstream minutes: "
+                + ", ".join(f"{kind} {clock.seconds / 60:.1f}" for kind, clock in upstream.items())
+                + f" | TTS reconnects {tts_session.reconnects}"
+            )
 
-        # ── Post-session pipeline ─────────────────────────────────────────────
-        # Only trigger if the user actually spoke (session has messages).
-        if google_id and session_id and current_session_history:
-            # Step 1: Save Tier 1 to DB — MUST complete before pipeline reads it
+        # Persist what this session taught the utterance gate
+        if google_id and pause_profile is not None and pause_profile.samples:
             try:
-                await save_session_history(
-                    google_id,
-                    session_id,
-                    session_started_at,
-                    current_session_history,
-                )
-                print(
-                    f"💾 Tier 1 saved to MongoDB for user {google_id} "
-                    f"(session {session_id[:8]}… | {len(current_session_history)} messages)"
-                )
+                await save_pause_profile(google_id, pause_profile.to_doc())
             except Exception as e:
-                print(f"❌ Tier 1 save failed: {e}")
-
-            # Steps 2-4: Analysis → Tier 2 → Tier 3 (fire-and-forget)
-            asyncio.create_task(
-                run_post_session_pipeline(
-                    google_id,
-                    session_id,
-                    current_session_history,
-                    session_started_at,
-                ),
-                name=f"pipeline-{session_id[:8]}",
+                print(f"⚠️  Pause profile save failed: {e}")
+
+        if resumable:
+            # Store the tail now so a crash during the grace period loses nothing
+            await persister.flush()
+            print(
+                f"⏸️  Session {session_id[:8]}… suspended for "
+                f"{settings.SESSION_RESUME_GRACE_S:.0f}s (active: {active})"
             )
-            print(f"🧠 Post-session pipeline queued for session {session_id[:8]}…")
-
-        print(f"🚪 Session closed (active: {active})")
+        else:
+            discard(token)
+            await _finish_session(state)
+            print(f"🚪 Session closed (active: {active})")
+        unregister_session(drained.set)
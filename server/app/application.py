@@ -0,0 +1,118 @@
+"""
+FastAPI application.
+Registers all routers and middleware here. Exposed as `app.app` (see
+app/__init__.py); the server is only built when something asks for it.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from app.api.v1 import ws as ws_routes
+from app.api.v1 import auth as auth_routes
+from app.api.v1 import users as user_routes
+from app.api.v1 import memory as memory_routes
+from app.api.v1 import analysis as analysis_routes
+from app.middleware.auth_middleware import AuthMiddleware
+from app.core.config import settings
+from app.core.metrics import render_prometheus, watch_event_loop_lag
+from app.core.turn_trace import latency_report
+from app.db.mongodb import connect_db, close_db
+from app.services.deepgram_pool_service import start_pools, stop_pools
+from app.services.heartbeat_service import heartbeat
+from app.services.session_registry_service import finish_all
+from app.services.job_queue_service import JobWorker
+from app.services.memory_pipeline_service import JOB_HANDLERS
+from app.services.shutdown_service import drain_pipelines
+
+
+# ── Lifecycle ─────────────────────────────────────────────────────────────────
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("🚀 Server starting up...")
+    await connect_db()
+    heartbeat.start()
+    start_pools()
+    # Post-session jobs normally run in worker.py; opt-in here for local dev
+    job_worker = JobWorker(JOB_HANDLERS) if settings.JOB_WORKER_IN_PROCESS else None
+    if job_worker is not None:
+        job_worker.start()
+    loop_lag_task = asyncio.create_task(watch_event_loop_lag(), name="loop-lag")
+    yield
+    print("💾 Server shutting down — saving state...")
+    loop_lag_task.cancel()
+    # Finish sessions waiting for a resume, then give running post-session
+    # jobs until the drain deadline; the rest go back to the queue
+    await drain_pipelines(finish_all, job_worker)
+    await stop_pools()
+    await heartbeat.stop()
+    await close_db()
+
+
+app = FastAPI(
+    title="AI Voice Companion",
+    description="Voice-first AI companion backend",
+    version="0.1.0",
+    lifespan=lifespan,
+)
+
+# ── CORS ──────────────────────────────────────────────────────────────────────
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=settings.CORS_ORIGINS,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# ── Routers ───────────────────────────────────────────────────────────────────
+app.include_router(ws_routes.router)                            # /ws  (WebSocket)
+app.include_router(auth_routes.router,     prefix="/api/v1")   # /api/v1/auth
+app.include_router(user_routes.router,     prefix="/api/v1")   # /api/v1/users
+app.include_router(memory_routes.router,   prefix="/api/v1")   # /api/v1/memory
+app.include_router(analysis_routes.router, prefix="/api/v1")   # /api/v1/analysis
+
+
+# ── Health check ─────────────────────────────────────────────────────────────
+@app.get("/health")
+async def health_check():
+    return {"status": "ok", "service": "lila"}
+
+
+# ── Prometheus metrics ───────────────────────────────────────────────────────
+# Operator endpoints (/metrics, /internal/*) are public to the auth
+# middleware so tooling needs no user JWT — and end users' JWTs grant no
+# access; they are guarded by METRICS_TOKEN (Authorization: Bearer <token>).
+# Without a token they fail closed (404) unless METRICS_OPEN is set.
+def _operator_denied(request: Request) -> PlainTextResponse | None:
+    """The response refusing `request`, or None when it may proceed."""
+    if not settings.METRICS_TOKEN:
+        if settings.METRICS_OPEN:
+            return None
+        return PlainTextResponse("Not Found\n", status_code=404)
+    if request.headers.get("Authorization", "") != f"Bearer {settings.METRICS_TOKEN}":
+        return PlainTextResponse("Unauthorized\n", status_code=401)
+    return None
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    denied = _operator_denied(request)
+    if denied is not None:
+        return denied
+    return PlainTextResponse(
+        render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+# ── Internal: per-stage turn latency (p50/p95/p99 over recent turns) ─────────
+@app.get("/internal/latency")
+async def turn_latency(request: Request):
+    denied = _operator_denied(request)
+    if denied is not None:
+        return denied
+    return latency_report()
+
+# ── Middleware ───────────────────────────────────────────────────────────────
+app.add_middleware(AuthMiddleware)
@@ -58,6 +58,38 @@ class Settings:
     # ── Server ─────────────────────────────────────────────────────────────────
     PORT: int = int(os.environ.get("PORT", 8000))
     MAX_CONCURRENT_CONNECTIONS: int = int(os.environ.get("MAX_CONCURRENT_CONNECTIONS", 10))
+    # Bearer token required by GET /metrics and /internal/*. With no token the
+    # endpoints answer 404 unless METRICS_OPEN=true (local development only).
+    METRICS_TOKEN: str = os.environ.get("METRICS_TOKEN", "")
+    METRICS_OPEN: bool = os.environ.get("METRICS_OPEN", "false").lower() == "true"
+    # Per-client outbound queue: drop interim captions above the first limit,
+    # disconnect the client above the second or when one send blocks too long.
+    WS_SEND_QUEUE_CAPTION_DROP_BYTES: int = int(os.environ.get("WS_SEND_QUEUE_CAPTION_DROP_BYTES", 256_000))
+    WS_SEND_QUEUE_MAX_BYTES: int = int(os.environ.get("WS_SEND_QUEUE_MAX_BYTES", 2_000_000))
+    WS_SEND_TIMEOUT_S: float = float(os.environ.get("WS_SEND_TIMEOUT_S", 15))
+    # Minimum gap between interim caption frames (finals are never delayed)
+    CAPTION_MIN_INTERVAL_MS: int = int(os.environ.get("CAPTION_MIN_INTERVAL_MS", 150))
+    # WebSocket-level pings uvicorn sends to browsers; a peer that does not
+    # answer within the timeout is closed.
+    WS_PING_INTERVAL_S: float = float(os.environ.get("WS_PING_INTERVAL_S", 20))
+    WS_PING_TIMEOUT_S: float = float(os.environ.get("WS_PING_TIMEOUT_S", 20))
+    # Shared heartbeat wheel: tick resolution, per-session check interval,
+    # and how long a browser may go without sending audio before it is closed.
+    HEARTBEAT_TICK_S: float = float(os.environ.get("HEARTBEAT_TICK_S", 1))
+    SESSION_HEARTBEAT_S: float = float(os.environ.get("SESSION_HEARTBEAT_S", 5))
+    WS_CLIENT_IDLE_TIMEOUT_S: float = float(os.environ.get("WS_CLIENT_IDLE_TIMEOUT_S", 60))
+    # Park a session after this long without a transcript (0 = never): audio
+    # stops going to Deepgram and the TTS socket returns to the pool. A
+    # browser chunk of at least this many bytes (and well above the parked
+    # noise floor) counts as speech and resumes the session.
+    SESSION_PARK_AFTER_S: float = float(os.environ.get("SESSION_PARK_AFTER_S", 45))
+    SESSION_PARK_RESUME_MIN_BYTES: int = int(os.environ.get("SESSION_PARK_RESUME_MIN_BYTES", 300))
+    # A session whose socket drops (client close 1001/1006) stays resumable for
+    # this long; a reconnect with its resume token continues it (0 = off).
+    SESSION_RESUME_GRACE_S: float = float(os.environ.get("SESSION_RESUME_GRACE_S", 30))
+    # On shutdown, live sessions and post-session pipelines get this long to
+    # finish; pipelines still running are deferred to the next start.
+    SHUTDOWN_DRAIN_TIMEOUT_S: float = float(os.environ.get("SHUTDOWN_DRAIN_TIMEOUT_S", 25))
 
     # CORS: allow requests only from the active frontend origin.
     # Override by setting CORS_ORIGINS as a comma-separated list in .env
@@ -74,11 +106,77 @@ class Settings:
         f"{BACKEND_URL}/api/v1/auth/google/callback",
     )
     
+    # ── Realtime voice pipeline ────────────────────────────────────────────────
+    # Warm STT and TTS sockets kept pre-connected per process (0 = no pool),
+    # and how long an idle pooled socket may live before it is recycled.
+    DEEPGRAM_POOL_SIZE: int = int(os.environ.get("DEEPGRAM_POOL_SIZE", 2))
+    DEEPGRAM_POOL_MAX_AGE_S: int = int(os.environ.get("DEEPGRAM_POOL_MAX_AGE_S", 240))
+    # Seconds of browser audio kept per session to replay after an STT socket
+    # drop, and how many mid-session reconnects a session may use.
+    STT_REPLAY_BUFFER_S: float = float(os.environ.get("STT_REPLAY_BUFFER_S", 5))
+    STT_MAX_RECONNECTS: int = int(os.environ.get("STT_MAX_RECONNECTS", 5))
+    # Sentences kept in flight on the TTS socket (Speak+Flush sent ahead of
+    # the sentence being forwarded). 1 = strictly one sentence at a time.
+    TTS_PIPELINE_DEPTH: int = int(os.environ.get("TTS_PIPELINE_DEPTH", 3))
+    # Forward LLM tokens to TTS as they arrive instead of whole sentences.
+    TTS_STREAM_TOKENS: bool = os.environ.get("TTS_STREAM_TOKENS", "true").lower() == "true"
+    # Flush early after the first clause once it is this long (0 = disabled).
+    TTS_EARLY_FLUSH_CHARS: int = int(os.environ.get("TTS_EARLY_FLUSH_CHARS", 30))
+    # TTS socket reconnects: exponential backoff between failing attempts,
+    # and a circuit breaker that stops reconnecting for COOLDOWN seconds
+    # after FAILURES failed (or immediately re-dropped) reconnects in a row.
+    TTS_RECONNECT_BACKOFF_S: float = float(os.environ.get("TTS_RECONNECT_BACKOFF_S", 0.5))
+    TTS_RECONNECT_BACKOFF_MAX_S: float = float(os.environ.get("TTS_RECONNECT_BACKOFF_MAX_S", 8))
+    TTS_CIRCUIT_FAILURES: int = int(os.environ.get("TTS_CIRCUIT_FAILURES", 3))
+    TTS_CIRCUIT_COOLDOWN_S: float = float(os.environ.get("TTS_CIRCUIT_COOLDOWN_S", 30))
+
+    # ── Utterance gate ─────────────────────────────────────────────────────────
+    # The silent window after an open-ended segment is this percentile of the
+    # user's learned mid-turn pauses, clamped to [MIN, MAX] milliseconds.
+    UTTERANCE_WINDOW_PERCENTILE: float = float(os.environ.get("UTTERANCE_WINDOW_PERCENTILE", 0.9))
+    UTTERANCE_WINDOW_MIN_MS: int = int(os.environ.get("UTTERANCE_WINDOW_MIN_MS", 500))
+    UTTERANCE_WINDOW_MAX_MS: int = int(os.environ.get("UTTERANCE_WINDOW_MAX_MS", 2500))
+    # Fire the LLM immediately when the turn-completion model's probability
+    # that the transcript is a finished turn reaches this threshold.
+    TURN_COMPLETE_THRESHOLD: float = float(os.environ.get("TURN_COMPLETE_THRESHOLD", 0.5))
+    # Start the Groq request on an interim transcript that stayed unchanged
+    # for N consecutive interim results and already scores as a complete turn.
+    LLM_SPECULATIVE: bool = os.environ.get("LLM_SPECULATIVE", "false").lower() == "true"
+    LLM_SPECULATIVE_STABLE_RESULTS: int = int(os.environ.get("LLM_SPECULATIVE_STABLE_RESULTS", 2))
+    # Interrupt Lila on interim results once the user has said this many
+    # words, or spoken for this long, over her.
+    BARGE_IN_MIN_WORDS: int = int(os.environ.get("BARGE_IN_MIN_WORDS", 2))
+    BARGE_IN_MIN_SPEECH_MS: int = int(os.environ.get("BARGE_IN_MIN_SPEECH_MS", 600))
+
     # ── Memory / Conversation ──────────────────────────────────────────────────
+    # Tier 1 write-behind: $push new messages every N messages or T seconds,
+    # at most MAX_BATCH messages per write.
+    TIER1_FLUSH_TURNS: int = int(os.environ.get("TIER1_FLUSH_TURNS", 4))
+    TIER1_FLUSH_INTERVAL_S: float = float(os.environ.get("TIER1_FLUSH_INTERVAL_S", 30))
+    TIER1_MAX_BATCH_TURNS: int = int(os.environ.get("TIER1_MAX_BATCH_TURNS", 50))
+    # Tier 1 is stored as chunks of this many messages (conversation_chunks)
+    CONVERSATION_CHUNK_TURNS: int = int(os.environ.get("CONVERSATION_CHUNK_TURNS", 50))
     # No per-session window cap — Lila always receives the full current session.
     TIER2_MAX_TOKENS: int = 250      # approximate ceiling for memory prose
     TIER3_MAX_POINTS: int = 20       # max imprints per user
 
+    # ── Background jobs ───────────────────────────────────────────────────────
+    # Post-session pipelines are durable jobs in MongoDB (`jobs`), run by
+    # `python worker.py` processes (any number) so Gemini work stays off the
+    # voice server. Deployments must start at least one worker; set
+    # JOB_WORKER_IN_PROCESS=true to run jobs in the API process instead
+    # (single-process local development).
+    JOB_WORKER_IN_PROCESS: bool = os.environ.get("JOB_WORKER_IN_PROCESS", "false").lower() == "true"
+    JOB_WORKER_CONCURRENCY: int = int(os.environ.get("JOB_WORKER_CONCURRENCY", 2))
+    JOB_POLL_INTERVAL_S: float = float(os.environ.get("JOB_POLL_INTERVAL_S", 2))
+    # A claimed job is held this long and renewed every third of it; a worker
+    # that dies loses the lease and another one retries the job.
+    JOB_LEASE_S: float = float(os.environ.get("JOB_LEASE_S", 120))
+    # Failed attempts retry after BACKOFF · 2^(attempt-1), capped at MAX
+    JOB_MAX_ATTEMPTS: int = int(os.environ.get("JOB_MAX_ATTEMPTS", 5))
+    JOB_RETRY_BACKOFF_S: float = float(os.environ.get("JOB_RETRY_BACKOFF_S", 30))
+    JOB_RETRY_BACKOFF_MAX_S: float = float(os.environ.get("JOB_RETRY_BACKOFF_MAX_S", 1800))
+
 
 settings = Settings()
 
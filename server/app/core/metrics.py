@@ -0,0 +1,245 @@
+"""
+In-process metrics
+------------------
+Minimal metric registry shared by the realtime services.
+
+Every mutation happens on the event-loop thread — code running in worker
+threads hands its update over with `loop.call_soon_threadsafe` — so the
+metric objects need no locks.
+
+Metrics are identified by name plus optional labels:
+    counter("deepgram_stt_pool_hits_total", "...")
+    histogram("turn_stage_ms", "...", stage="first_token")
+
+render_prometheus() serialises the registry in the Prometheus text
+exposition format for the /metrics endpoint.
+"""
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left
+from collections import deque
+from typing import Callable
+
+# Recent observations kept per histogram for percentile reporting
+_QUANTILE_WINDOW = 1024
+
+# Default latency buckets in milliseconds
+DEFAULT_MS_BUCKETS: tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+)
+
+
+class Counter:
+    """Monotonically increasing value (e.g. wasted tokens, reconnects)."""
+
+    def __init__(self, name: str, description: str, labels: dict[str, str]) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.value: float = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class Gauge:
+    """Point-in-time value. With `fn`, the value is read at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: dict[str, str],
+        fn: Callable[[], float] | None = None,
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.value: float = 0
+        self._fn = fn
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def read(self) -> float:
+        return self._fn() if self._fn else self.value
+
+
+class Histogram:
+    """Fixed-bucket distribution of observed values (e.g. latencies in ms)."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: dict[str, str],
+        buckets: tuple[float, ...] = DEFAULT_MS_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # counts[i] = observations <= buckets[i] (non-cumulative); last = +Inf
+        self.counts: list[int] = [0] * (len(self.buckets) + 1)
+        self.sum: float = 0
+        self.count: int = 0
+        self.recent: deque[float] = deque(maxlen=_QUANTILE_WINDOW)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantiles(self, *qs: float) -> list[float | None]:
+        """Nearest-rank quantiles over the most recent observations."""
+        if not self.recent:
+            return [None for _ in qs]
+        ordered = sorted(self.recent)
+        last = len(ordered) - 1
+        return [ordered[min(last, int(q * len(ordered)))] for q in qs]
+
+
+Metric = Counter | Gauge | Histogram
+
+_REGISTRY: dict[tuple[str, tuple], Metric] = {}
+
+
+def collect(name: str) -> list[Metric]:
+    """Every registered metric called `name`, across all label sets."""
+    return [metric for (metric_name, _), metric in _REGISTRY.items() if metric_name == name]
+
+
+def _key(name: str, labels: dict[str, str]) -> tuple[str, tuple]:
+    return name, tuple(sorted(labels.items()))
+
+
+def counter(name: str, description: str, **labels: str) -> Counter:
+    """Return the counter registered under `name`/`labels`, creating it on first use."""
+    key = _key(name, labels)
+    metric = _REGISTRY.get(key)
+    if metric is None:
+        metric = _REGISTRY[key] = Counter(name, description, labels)
+    return metric
+
+
+def gauge(
+    name: str,
+    description: str,
+    fn: Callable[[], float] | None = None,
+    **labels: str,
+) -> Gauge:
+    """Return the gauge registered under `name`/`labels`, creating it on first use."""
+    key = _key(name, labels)
+    metric = _REGISTRY.get(key)
+    if metric is None:
+        metric = _REGISTRY[key] = Gauge(name, description, labels, fn)
+    return metric
+
+
+def histogram(
+    name: str,
+    description: str,
+    buckets: tuple[float, ...] = DEFAULT_MS_BUCKETS,
+    **labels: str,
+) -> Histogram:
+    """Return the histogram registered under `name`/`labels`, creating it on first use."""
+    key = _key(name, labels)
+    metric = _REGISTRY.get(key)
+    if metric is None:
+        metric = _REGISTRY[key] = Histogram(name, description, labels, buckets)
+    return metric
+
+
+# ── Prometheus text exposition ───────────────────────────────────────────────
+
+_TYPES = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str], **extra: str) -> str:
+    merged = {**labels, **extra}
+    if not merged:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in merged.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus() -> str:
+    """Serialise every registered metric in the Prometheus text format (0.0.4)."""
+    families: dict[str, list[Metric]] = {}
+    for (name, _), metric in sorted(_REGISTRY.items(), key=lambda item: item[0]):
+        families.setdefault(name, []).append(metric)
+
+    lines: list[str] = []
+    for name, metrics in families.items():
+        first = metrics[0]
+        lines.append(f"# HELP {name} {first.description}")
+        lines.append(f"# TYPE {name} {_TYPES[type(first)]}")
+        for metric in metrics:
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                for bound, count in zip(metric.buckets, metric.counts):
+                    cumulative += count
+                    lines.append(
+                        f"{name}_bucket{_format_labels(metric.labels, le=_format_value(float(bound)))} {cumulative}"
+                    )
+                lines.append(f"{name}_bucket{_format_labels(metric.labels, le='+Inf')} {metric.count}")
+                lines.append(f"{name}_sum{_format_labels(metric.labels)} {_format_value(metric.sum)}")
+                lines.append(f"{name}_count{_format_labels(metric.labels)} {metric.count}")
+            elif isinstance(metric, Gauge):
+                lines.append(f"{name}{_format_labels(metric.labels)} {_format_value(metric.read())}")
+            else:
+                lines.append(f"{name}{_format_labels(metric.labels)} {_format_value(metric.value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ── Shared metrics ───────────────────────────────────────────────────────────
+# Metrics recorded by more than one module, defined once so their help text
+# does not depend on which module registered them first.
+
+def deepgram_reconnects(kind: str) -> Counter:
+    """deepgram_reconnects_total{kind} — `kind` is "stt" or "tts"."""
+    return counter(
+        "deepgram_reconnects_total",
+        "Deepgram sockets re-opened after dropping mid-session",
+        kind=kind,
+    )
+
+
+# ── Event-loop lag ───────────────────────────────────────────────────────────
+
+async def watch_event_loop_lag(interval: float = 0.5) -> None:
+    """
+    Background task: sleep `interval` seconds and record how late the loop
+    woke up. Sustained lag means something is blocking the event loop and
+    every live audio stream is stalling with it.
+    """
+    lag_ms = histogram(
+        "event_loop_lag_ms",
+        "Event-loop wake-up delay beyond the scheduled interval",
+        buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+    )
+    last_lag_ms = gauge("event_loop_lag_last_ms", "Most recent event-loop lag sample")
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, (loop.time() - started - interval) * 1000)
+        lag_ms.observe(lag)
+        last_lag_ms.set(lag)
@@ -0,0 +1,93 @@
+"""
+Per-turn latency tracing
+------------------------
+A TurnTrace follows one user turn through STT → LLM → TTS → client and
+timestamps each stage the first time it is reached:
+
+    speech_final          Deepgram `speech_final` received (trace origin)
+    gate_decision         utterance gate decided to fire the LLM
+    llm_request_sent      Groq request issued
+    first_token           first content token from Groq
+    first_sentence_queued first TTS segment boundary queued
+    first_tts_byte        first audio frame from Deepgram TTS
+    first_client_byte     first audio frame sent to the browser
+
+finish() records every reached stage, relative to speech_final, into the
+turn_stage_latency_ms{stage=...} histograms; latency_report() summarises
+them as p50/p95/p99 for the internal /internal/latency endpoint.
+"""
+import time
+
+from app.core.metrics import collect, histogram
+
+STAGES: tuple[str, ...] = (
+    "gate_decision",
+    "llm_request_sent",
+    "first_token",
+    "first_sentence_queued",
+    "first_tts_byte",
+    "first_client_byte",
+)
+
+_METRIC = "turn_stage_latency_ms"
+_DESCRIPTION = "Latency from speech_final to each turn stage"
+
+
+class TurnTrace:
+    """Stage timestamps for a single turn. Only the first mark of a stage counts."""
+
+    def __init__(self) -> None:
+        self.marks: dict[str, float] = {"speech_final": time.perf_counter()}
+        self._finished = False
+
+    def mark(self, stage: str) -> None:
+        if stage not in self.marks:
+            self.marks[stage] = time.perf_counter()
+
+    def rebase(self, origin: "TurnTrace") -> None:
+        """
+        Move this trace onto `origin`'s speech_final (and gate decision).
+        Used when a speculative completion is committed: stages it reached
+        before the gate fired count as reached at the gate decision.
+        """
+        floor = origin.marks.get("gate_decision", time.perf_counter())
+        for stage, at in self.marks.items():
+            self.marks[stage] = max(at, floor)
+        self.marks.update(origin.marks)
+
+    def elapsed_ms(self, stage: str) -> float | None:
+        if stage not in self.marks:
+            return None
+        return (self.marks[stage] - self.marks["speech_final"]) * 1000
+
+    def finish(self) -> None:
+        """Record the reached stages into the per-stage histograms (once)."""
+        if self._finished:
+            return
+        self._finished = True
+        for stage in STAGES:
+            elapsed = self.elapsed_ms(stage)
+            if elapsed is not None:
+                histogram(_METRIC, _DESCRIPTION, stage=stage).observe(elapsed)
+        summary = ", ".join(
+            f"{stage} {self.elapsed_ms(stage):.0f}"
+            for stage in STAGES
+            if stage in self.marks
+        )
+        print(f"\n⏱️  Turn latency ms: {summary}")
+
+
+def latency_report() -> dict:
+    """Per-stage count and p50/p95/p99 (ms) over recent turns."""
+    by_stage = {m.labels.get("stage"): m for m in collect(_METRIC)}
+    report = {}
+    for stage in STAGES:
+        metric = by_stage.get(stage)
+        if metric is None:
+            continue
+        p50, p95, p99 = (
+            None if q is None else round(q, 1)
+            for q in metric.quantiles(0.50, 0.95, 0.99)
+        )
+        report[stage] = {"count": metric.count, "p50": p50, "p95": p95, "p99": p99}
+    return report
@@ -5,17 +5,56 @@ Usage:
     from app.db.mongodb import db
     users = db["users"]
 """
+import asyncio
+
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import ASCENDING, DESCENDING
+from pymongo import ASCENDING, DESCENDING, monitoring
 from app.core.config import settings
+from app.core.metrics import histogram
 
 client: AsyncIOMotorClient | None = None
 db = None
 
 
+def _observe_command(command_name: str, duration_micros: int) -> None:
+    """Event-loop side of _CommandLatencyListener."""
+    histogram(
+        "mongo_command_latency_ms",
+        "MongoDB command round-trip latency",
+        command=command_name,
+    ).observe(duration_micros / 1000)
+
+
+class _CommandLatencyListener(monitoring.CommandListener):
+    """
+    Records every MongoDB command's latency in mongo_command_latency_ms.
+    Motor runs pymongo in worker threads, so observations are handed to the
+    event loop rather than mutating the histogram from the driver thread.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    def _record(self, command_name: str, duration_micros: int) -> None:
+        # Driver thread: hand over plain values, touch no metric state here
+        self._loop.call_soon_threadsafe(_observe_command, command_name, duration_micros)
+
+    def started(self, event) -> None:
+        pass
+
+    def succeeded(self, event) -> None:
+        self._record(event.command_name, event.duration_micros)
+
+    def failed(self, event) -> None:
+        self._record(event.command_name, event.duration_micros)
+
+
 async def connect_db():
     global client, db
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    client = AsyncIOMotorClient(
+        settings.MONGODB_URL,
+        event_listeners=[_CommandLatencyListener(asyncio.get_running_loop())],
+    )
     db = client[settings.MONGODB_DB_NAME]
     # Ensure indexes for production best practices
     await db["users"].create_index("google_id", unique=True)
@@ -32,6 +71,16 @@ async def connect_db():
         unique=True,
     )
     await db["conversations"].create_index([("google_id", ASCENDING), ("started_at", DESCENDING)])
+    # Tier 1 turn chunks — unique per position, read back in seq order
+    await db["conversation_chunks"].create_index(
+        [("google_id", ASCENDING), ("session_id", ASCENDING), ("seq", ASCENDING)],
+        unique=True,
+    )
+    # Durable job queue — idempotency key, claim scans, finished jobs expire
+    await db["jobs"].create_index("key", unique=True)
+    await db["jobs"].create_index([("status", ASCENDING), ("run_at", ASCENDING)])
+    await db["jobs"].create_index([("status", ASCENDING), ("lease_until", ASCENDING)])
+    await db["jobs"].create_index("finished_at", expireAfterSeconds=7 * 24 * 3600)
     # Analyses collection — one document per session, fast per-user date-sorted queries
     await db["analyses"].create_index(
         [("session_id", ASCENDING)],
@@ -51,6 +51,8 @@ class AuthMiddleware:
             or request.url.path.startswith("/openapi")
             or request.url.path.startswith("/favicon")
             or request.url.path.startswith("/.well-known")
+            or request.url.path == "/metrics"   # guarded by METRICS_TOKEN instead
+            or request.url.path.startswith("/internal/")   # likewise
         ):
             return await self.app(scope, receive, send)
             
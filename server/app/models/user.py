@@ -14,5 +14,7 @@ class User(BaseModel):
 	picture: Optional[str] = None
 	created_at: datetime = Field(default_factory=datetime.utcnow)
 	last_login: Optional[datetime] = None
+	# Learned mid-turn pause histogram (see turn_taking_service.PauseProfile)
+	pause_profile: Optional[dict] = None
 
 	model_config = {"from_attributes": True}
@@ -5,7 +5,8 @@ Analyses a completed conversation session using Google Gemini.
 
 Flow
 ────
-1.  Fetch the raw session history from `conversations` collection.
+1.  Stream the raw session history from Tier 1 (`conversations` header
+    plus its `conversation_chunks`).
 2.  Build a structured prompt requesting a JSON analysis report.
 3.  Call Gemini with response_mime_type="application/json" so the SDK
     returns a guaranteed-parseable JSON string — no regex needed.
@@ -16,8 +17,8 @@ Error handling
 ──────────────
 - Any exception during Gemini call or parsing → status="failed" is saved so
   the frontend can render a graceful empty state rather than showing nothing.
-- The function is designed to be called as a fire-and-forget asyncio task
-  (ws.py creates it with asyncio.create_task) — it never raises to the caller.
+- It never raises to the caller; it returns False when the analysis failed
+  so the post-session job can retry it (job_queue_service).
 """
 from __future__ import annotations
 
@@ -33,6 +34,7 @@ from google.genai import types as genai_types
 import app.db.mongodb as mongodb
 from app.core.config import settings
 from app.models.analysis import ConversationAnalysis, GrammarCorrection
+from app.services.memory_mongo_service import get_session_header, iter_session_history
 
 # ── Gemini client ─────────────────────────────────────────────────────────────
 # Double-checked locking with a threading.Lock ensures thread-safe lazy
@@ -129,12 +131,12 @@ def _count_user_messages(history: List[dict]) -> int:
 
 
 async def _fetch_session_from_db(google_id: str, session_id: str) -> Optional[dict]:
-    """Return the conversations document for this session, or None."""
-    db = mongodb.db
-    return await db["conversations"].find_one(
-        {"google_id": google_id, "session_id": session_id},
-        {"history": 1, "started_at": 1, "updated_at": 1},
-    )
+    """Return the session's header document with its full `history`, or None."""
+    doc = await get_session_header(google_id, session_id)
+    if doc is None:
+        return None
+    doc["history"] = [m async for m in iter_session_history(google_id, session_id, doc)]
+    return doc
 
 
 async def _upsert_analysis(analysis: ConversationAnalysis) -> None:
@@ -171,11 +173,12 @@ async def _call_gemini(transcript: str) -> dict:
 
 # ── Public entry point ────────────────────────────────────────────────────────
 
-async def run_analysis_for_session(google_id: str, session_id: str) -> None:
+async def run_analysis_for_session(google_id: str, session_id: str) -> bool:
     """
-    Fire-and-forget: analyse a session and persist the result.
+    Analyse a session and persist the result.
 
-    Called from ws.py via asyncio.create_task — never raises.
+    Called by the post-session pipeline — never raises. Returns False when
+    the analysis was stored as failed, so the job can be retried.
     """
     print(f"\n🔍 Starting analysis for session {session_id[:8]}… (user: {google_id})")
 
@@ -239,6 +242,7 @@ async def run_analysis_for_session(google_id: str, session_id: str) -> None:
         # ── 7. Persist ────────────────────────────────────────────────────────
         await _upsert_analysis(analysis)
         print(f"✅ Analysis done for session {session_id[:8]}… — score: {analysis.fluency_score}, CEFR: {analysis.cefr_level}")
+        return True
 
     except Exception as e:
         print(f"❌ Analysis failed for session {session_id[:8]}…: {e}")
@@ -250,6 +254,7 @@ async def run_analysis_for_session(google_id: str, session_id: str) -> None:
             error_detail=str(e),
         )
         await _upsert_analysis(failed)
+        return False
 
 
 # ── Read helpers (used by API routes) ────────────────────────────────────────
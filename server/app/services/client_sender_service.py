@@ -0,0 +1,280 @@
+"""
+Client Sender Service
+---------------------
+Per-connection outbound queue for the browser WebSocket.
+
+Everything the server sends to a /ws client — captions, TTS audio frames,
+control messages — is appended to a bounded in-memory queue and written by
+one dedicated writer task. Producers (the STT reader, the TTS forwarder)
+never await the client socket, so a browser on a slow mobile link can no
+longer stall the Deepgram reader or delay `Flushed` handling.
+
+ClientSender duck-types the send_text / send_bytes half of a Starlette
+WebSocket, so it can be handed to send_llm_response and TTSPipeline as-is.
+
+Slow-consumer policy (queue measured in bytes):
+  - above WS_SEND_QUEUE_CAPTION_DROP_BYTES : interim captions are dropped
+    (queued ones purged, new ones discarded) — they are stale by the time
+    the client would see them anyway.
+  - above WS_SEND_QUEUE_MAX_BYTES, or one send blocked for longer than
+    WS_SEND_TIMEOUT_S : the client is disconnected with 1013 (Try Again
+    Later); the frontend reconnects on any non-1000 close.
+
+Stats: ws_send_queue_bytes (depth at enqueue), ws_send_latency_ms (enqueue →
+written), ws_send_dropped_total{reason} and ws_slow_consumer_disconnects_total.
+
+CaptionForwarder sits in front of the sender for STT captions: interim text
+is deduplicated and coalesced to one frame per CAPTION_MIN_INTERVAL_MS,
+finals go out immediately.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+
+from app.core.config import settings
+from app.core.metrics import counter, gauge, histogram
+
+# Message kinds — decide what may be dropped
+_AUDIO = "audio"          # PCM frames and their tts_start / tts_end markers
+_CAPTION = "caption"      # interim STT captions
+_CONTROL = "control"      # everything else — never dropped before disconnect
+
+# TTSPipeline's sentence markers are sent with send_text; they travel with the
+# audio they frame and are purged together with it on barge-in.
+_TTS_MARKER_PREFIX = '{"type": "tts_'
+
+_total_queued_bytes: int = 0
+
+gauge(
+    "ws_send_queue_bytes_total",
+    "Bytes waiting in all client outbound queues",
+    fn=lambda: _total_queued_bytes,
+)
+_queue_bytes = histogram(
+    "ws_send_queue_bytes",
+    "Client outbound queue depth (bytes) when a message is enqueued",
+    buckets=(1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2e6, 4e6),
+)
+_send_latency_ms = histogram(
+    "ws_send_latency_ms",
+    "Time a message spent queued plus the client socket write",
+)
+_slow_disconnects = counter(
+    "ws_slow_consumer_disconnects_total",
+    "Clients disconnected for falling too far behind the outbound stream",
+)
+
+
+def _dropped(reason: str):
+    return counter(
+        "ws_send_dropped_total",
+        "Outbound messages discarded before reaching the client",
+        reason=reason,
+    )
+
+
+class ClientSender:
+    """Bounded outbound queue + writer task for one /ws connection."""
+
+    def __init__(self, websocket) -> None:
+        self.websocket = websocket
+        self.closed = False
+        self._queue: deque[tuple[str, str | bytes, float]] = deque()
+        self._queued_bytes = 0
+        self._ready = asyncio.Event()
+        self._writer: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write_loop(), name="ws-writer")
+
+    async def close(self, timeout: float = 2.0) -> None:
+        """Give queued messages `timeout` seconds to go out, then stop the writer."""
+        if self._writer is None:
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue and not self.closed and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        self.closed = True
+        self._purge({_AUDIO, _CAPTION, _CONTROL})
+        self._writer.cancel()
+        await asyncio.gather(self._writer, return_exceptions=True)
+        self._writer = None
+
+    # ── Producer side (never blocks) ──────────────────────────────────────────
+
+    async def send_text(self, text: str) -> None:
+        self._enqueue(_AUDIO if text.startswith(_TTS_MARKER_PREFIX) else _CONTROL, text)
+
+    async def send_bytes(self, data: bytes) -> None:
+        self._enqueue(_AUDIO, data)
+
+    async def send_caption(self, text: str, interim: bool) -> None:
+        """STT caption; interim ones are the first casualty of a slow link."""
+        self._enqueue(_CAPTION if interim else _CONTROL, text)
+
+    def interrupt(self, text: str) -> None:
+        """Barge-in: drop queued audio and captions, send `text` ahead of the rest."""
+        if self.closed:
+            return
+        dropped = self._purge({_AUDIO, _CAPTION})
+        if dropped:
+            _dropped("barge_in").inc(dropped)
+        self._queue.appendleft((_CONTROL, text, time.perf_counter()))
+        self._account(len(text))
+        self._ready.set()
+
+    def _enqueue(self, kind: str, payload: str | bytes) -> None:
+        if self.closed:
+            return
+        size = len(payload)
+        _queue_bytes.observe(self._queued_bytes)
+
+        if self._queued_bytes + size > settings.WS_SEND_QUEUE_MAX_BYTES:
+            self._disconnect(f"{self._queued_bytes:,} bytes queued")
+            return
+        if self._queued_bytes >= settings.WS_SEND_QUEUE_CAPTION_DROP_BYTES:
+            dropped = self._purge({_CAPTION})
+            if kind == _CAPTION:
+                dropped += 1
+            if dropped:
+                _dropped("slow_consumer").inc(dropped)
+            if kind == _CAPTION:
+                return
+
+        self._queue.append((kind, payload, time.perf_counter()))
+        self._account(size)
+        self._ready.set()
+
+    # ── Writer side ───────────────────────────────────────────────────────────
+
+    async def _write_loop(self) -> None:
+        websocket = self.websocket
+        try:
+            while True:
+                while not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                kind, payload, queued_at = self._queue.popleft()
+                self._account(-len(payload))
+                if isinstance(payload, bytes):
+                    send = websocket.send_bytes(payload)
+                else:
+                    send = websocket.send_text(payload)
+                await asyncio.wait_for(send, settings.WS_SEND_TIMEOUT_S)
+                _send_latency_ms.observe((time.perf_counter() - queued_at) * 1000)
+        except asyncio.TimeoutError:
+            self._disconnect(f"send blocked > {settings.WS_SEND_TIMEOUT_S}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Client went away — the receive side ends the session
+            self.closed = True
+            self._purge({_AUDIO, _CAPTION, _CONTROL})
+
+    def _disconnect(self, reason: str) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._purge({_AUDIO, _CAPTION, _CONTROL})
+        _slow_disconnects.inc()
+        print(f"🐌 Slow client disconnected ({reason})")
+        asyncio.create_task(self._close_socket())
+
+    async def _close_socket(self) -> None:
+        try:
+            await self.websocket.close(code=1013)  # Try Again Later
+        except Exception:
+            pass
+
+    def _purge(self, kinds: set[str]) -> int:
+        kept: deque[tuple[str, str | bytes, float]] = deque()
+        dropped = 0
+        for item in self._queue:
+            if item[0] in kinds:
+                self._account(-len(item[1]))
+                dropped += 1
+            else:
+                kept.append(item)
+        self._queue = kept
+        return dropped
+
+    def _account(self, delta: int) -> None:
+        global _total_queued_bytes
+        self._queued_bytes += delta
+        _total_queued_bytes += delta
+
+
+# ── Caption coalescing ───────────────────────────────────────────────────────
+
+def _captions(outcome: str):
+    return counter(
+        "ws_captions_total",
+        "STT caption events by outcome (sent, coalesced into a later frame, duplicate)",
+        outcome=outcome,
+    )
+
+
+class CaptionForwarder:
+    """
+    Rate-limits live STT captions on their way to a ClientSender.
+
+    Deepgram emits an interim result every few hundred milliseconds of
+    speech, often with unchanged text. Interim captions are sent at most once
+    per CAPTION_MIN_INTERVAL_MS, only when the text changed, and always as
+    the latest text; finals are sent immediately.
+    """
+
+    def __init__(self, sender: ClientSender) -> None:
+        self.sender = sender
+        self._min_interval = settings.CAPTION_MIN_INTERVAL_MS / 1000
+        self._last_text: str | None = None
+        self._last_sent_at = 0.0
+        self._pending: str | None = None
+        self._timer: asyncio.Task | None = None
+
+    async def interim(self, text: str) -> None:
+        if text == self._last_text or text == self._pending:
+            _captions("duplicate").inc()
+            return
+        wait = self._last_sent_at + self._min_interval - time.monotonic()
+        if wait <= 0:
+            self._cancel_pending()
+            await self._send(text, is_final=False)
+            return
+        if self._pending is not None:
+            _captions("coalesced").inc()
+        self._pending = text
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._send_later(wait))
+
+    async def final(self, text: str) -> None:
+        self._cancel_pending()
+        await self._send(text, is_final=True)
+
+    def close(self) -> None:
+        self._cancel_pending()
+
+    async def _send_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._timer = None
+        text, self._pending = self._pending, None
+        if text is not None:
+            await self._send(text, is_final=False)
+
+    def _cancel_pending(self) -> None:
+        if self._pending is not None:
+            _captions("coalesced").inc()
+            self._pending = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def _send(self, text: str, is_final: bool) -> None:
+        self._last_text = text
+        self._last_sent_at = time.monotonic()
+        _captions("sent").inc()
+        await self.sender.send_caption(
+            json.dumps({"transcript": text, "is_final": is_final}),
+            interim=not is_final,
+        )
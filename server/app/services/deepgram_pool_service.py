@@ -0,0 +1,183 @@
+"""
+Deepgram Socket Pool
+--------------------
+Per-process warm pool of pre-connected, authenticated Deepgram sockets.
+
+Opening a Deepgram socket costs a TLS + WebSocket handshake (and up to three
+retries with backoff) — paid on every /ws connect before the user can speak.
+The pool keeps DEEPGRAM_POOL_SIZE STT and TTS sockets open ahead of time and
+hands them out on connect.
+
+  - acquire()  : pops a healthy idle socket (hit) or connects inline (miss),
+                 then wakes the background refill.
+  - release()  : takes back a socket a parked session no longer needs; it
+                 is kept if healthy and the pool has room, closed otherwise.
+  - refill     : one background task per pool tops it back up to its target.
+  - keep-alive : a sweep on the shared heartbeat wheel sends idle STT
+                 sockets Deepgram `KeepAlive` control messages
+                 (Deepgram closes a silent STT stream after ~10 s). TTS has
+                 no KeepAlive message, so idle TTS sockets rely on protocol
+                 pings. Sockets that fail a health check or outlive
+                 DEEPGRAM_POOL_MAX_AGE_S are dropped and replaced.
+
+Hit/miss counts are exported as deepgram_{stt,tts}_pool_{hits,misses}_total.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+from websockets.protocol import State
+
+from app.core.config import settings
+from app.core.metrics import counter
+from app.services.heartbeat_service import Heartbeat, heartbeat
+from app.services.stt_service import connect_stt
+from app.services.tts_service import connect_tts
+
+# Interval between keep-alive / health sweeps of idle sockets (seconds)
+_SWEEP_INTERVAL_S = 5
+# Backoff after a failed refill before trying again (seconds)
+_REFILL_BACKOFF_S = 5
+
+
+class _SocketPool:
+    """Warm pool for one kind of Deepgram socket."""
+
+    def __init__(
+        self,
+        kind: str,
+        connect: Callable[[], Awaitable],
+        size: int,
+        keepalive_message: dict | None,
+    ) -> None:
+        self.kind = kind
+        self.size = size
+        self._connect = connect
+        self._keepalive = json.dumps(keepalive_message) if keepalive_message else None
+        self._idle: deque[tuple[object, float]] = deque()   # (socket, created_at)
+        self._wanted = asyncio.Event()
+        self._refill_task: asyncio.Task | None = None
+        self._sweep: Heartbeat | None = None
+        self.hits = counter(f"deepgram_{kind}_pool_hits_total", f"{kind.upper()} sockets served warm")
+        self.misses = counter(f"deepgram_{kind}_pool_misses_total", f"{kind.upper()} sockets connected inline")
+        self.returns = counter(f"deepgram_{kind}_pool_returns_total", f"{kind.upper()} sockets released back to the pool")
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def start(self) -> None:
+        if self.size <= 0:
+            return
+        self._wanted.set()
+        self._refill_task = asyncio.create_task(self._refill_loop(), name=f"{self.kind}-pool-refill")
+        self._sweep = heartbeat.register(self._sweep_idle, _SWEEP_INTERVAL_S, name=f"{self.kind}-pool")
+        print(f"🏊 {self.kind.upper()} socket pool started (target {self.size})")
+
+    async def stop(self) -> None:
+        if self._sweep is not None:
+            self._sweep.cancel()
+            self._sweep = None
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            await asyncio.gather(self._refill_task, return_exceptions=True)
+            self._refill_task = None
+        while self._idle:
+            ws, _ = self._idle.popleft()
+            await _close_quietly(ws)
+
+    async def acquire(self):
+        """Return a connected socket — warm from the pool when possible."""
+        while self._idle:
+            ws, _ = self._idle.popleft()
+            if _healthy(ws):
+                self.hits.inc()
+                self._wanted.set()
+                return ws
+            await _close_quietly(ws)
+
+        if self.size > 0:
+            self.misses.inc()
+            self._wanted.set()
+        return await self._connect()
+
+    async def release(self, ws) -> None:
+        """Return a socket to the pool (or close it if unhealthy / full)."""
+        if self.size > 0 and _healthy(ws) and len(self._idle) < self.size:
+            self._idle.append((ws, time.monotonic()))
+            self.returns.inc()
+            return
+        await _close_quietly(ws)
+
+    async def _refill_loop(self) -> None:
+        while True:
+            await self._wanted.wait()
+            self._wanted.clear()
+            while len(self._idle) < self.size:
+                try:
+                    ws = await self._connect()
+                except Exception as e:
+                    print(f"⚠️ {self.kind.upper()} pool refill failed: {e}")
+                    await asyncio.sleep(_REFILL_BACKOFF_S)
+                    continue
+                self._idle.append((ws, time.monotonic()))
+
+    async def _sweep_idle(self) -> None:
+        now = time.monotonic()
+        for entry in list(self._idle):
+            ws, created_at = entry
+            alive = _healthy(ws) and now - created_at < settings.DEEPGRAM_POOL_MAX_AGE_S
+            if alive and self._keepalive:
+                try:
+                    await ws.send(self._keepalive)
+                except Exception:
+                    alive = False
+            if not alive and entry in self._idle:
+                self._idle.remove(entry)
+                await _close_quietly(ws)
+                self._wanted.set()
+
+
+def _healthy(ws) -> bool:
+    return ws.state is State.OPEN
+
+
+async def _close_quietly(ws) -> None:
+    try:
+        await ws.close()
+    except Exception:
+        pass
+
+
+stt_pool = _SocketPool(
+    "stt", connect_stt, settings.DEEPGRAM_POOL_SIZE, {"type": "KeepAlive"},
+)
+tts_pool = _SocketPool(
+    "tts", connect_tts, settings.DEEPGRAM_POOL_SIZE, None,
+)
+
+
+async def acquire_stt():
+    """Deepgram STT socket for a new /ws session (warm when available)."""
+    return await stt_pool.acquire()
+
+
+async def acquire_tts():
+    """Deepgram TTS socket for a new /ws session (warm when available)."""
+    return await tts_pool.acquire()
+
+
+async def release_tts(ws) -> None:
+    """Hand a parked session's TTS socket back to the warm pool."""
+    await tts_pool.release(ws)
+
+
+def start_pools() -> None:
+    stt_pool.start()
+    tts_pool.start()
+
+
+async def stop_pools() -> None:
+    await asyncio.gather(stt_pool.stop(), tts_pool.stop())
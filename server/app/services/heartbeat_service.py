@@ -0,0 +1,151 @@
+"""
+Heartbeat Service
+-----------------
+One process-wide timer wheel that drives every periodic liveness check.
+
+Instead of each /ws connection (and each Deepgram pool) running its own
+sleep-loop task, callers register a `beat` coroutine with an interval. A
+single task advances the wheel once per tick and runs only the beats that
+are due, so thousands of idle connections cost one task, and each tick
+does work proportional to the beats due rather than to every registration.
+
+  wheel   : HEARTBEAT_TICK_S resolution, _SLOTS slots; intervals longer than
+            one revolution carry a remaining-rounds count.
+  beat    : async callable run when due; returning False unregisters it.
+            Due beats of one tick run concurrently off the wheel task, so a
+            slow or failing beat never delays the wheel for everyone else.
+
+Registered today:
+  - every /ws session: closes browsers that stopped sending audio and sends
+    Deepgram `KeepAlive` on its STT socket when no audio went upstream
+    recently (ws.py).
+  - the warm Deepgram pools' idle-socket sweep (deepgram_pool_service.py).
+
+Browser dead-peer detection at the protocol level is uvicorn's WebSocket
+ping (WS_PING_INTERVAL_S / WS_PING_TIMEOUT_S, see main.py); the Deepgram
+client sockets get protocol pings from the websockets library.
+"""
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable
+
+from app.core.config import settings
+from app.core.metrics import gauge, histogram
+
+_SLOTS = 64
+# A beat that takes longer than this is cancelled for the round — work that
+# must not stop half-way belongs in its own task, not in the beat
+_BEAT_TIMEOUT_S = 5
+
+_beat_ms = histogram(
+    "heartbeat_sweep_ms",
+    "Wall time to run all beats due in one heartbeat tick",
+)
+
+
+class Heartbeat:
+    """Handle for one registered beat; cancel() unregisters it."""
+
+    __slots__ = ("beat", "interval_ticks", "name", "rounds", "cancelled")
+
+    def __init__(self, beat: Callable[[], Awaitable], interval_ticks: int, name: str) -> None:
+        self.beat = beat
+        self.interval_ticks = interval_ticks
+        self.name = name
+        self.rounds = 0
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class _TimerWheel:
+    def __init__(self, tick_s: float, slots: int = _SLOTS) -> None:
+        self.tick_s = tick_s
+        self._slots: list[list[Heartbeat]] = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._task: asyncio.Task | None = None
+        self._batches: set[asyncio.Task] = set()
+        self.registered = 0
+
+    def register(
+        self,
+        beat: Callable[[], Awaitable],
+        interval_s: float,
+        name: str = "beat",
+    ) -> Heartbeat:
+        """Run `beat` every `interval_s` seconds until it is cancelled or returns False."""
+        entry = Heartbeat(beat, max(1, math.ceil(interval_s / self.tick_s)), name)
+        self._schedule(entry)
+        self.registered += 1
+        return entry
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="heartbeat-wheel")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for batch in list(self._batches):
+            batch.cancel()
+        await asyncio.gather(*self._batches, return_exceptions=True)
+
+    def _schedule(self, entry: Heartbeat) -> None:
+        slots = len(self._slots)
+        entry.rounds, offset = divmod(entry.interval_ticks, slots)
+        if offset == 0:
+            entry.rounds -= 1
+            offset = slots
+        self._slots[(self._cursor + offset) % slots].append(entry)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += self.tick_s
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            self._cursor = (self._cursor + 1) % len(self._slots)
+            bucket, self._slots[self._cursor] = self._slots[self._cursor], []
+
+            due: list[Heartbeat] = []
+            for entry in bucket:
+                if entry.cancelled:
+                    self.registered -= 1
+                elif entry.rounds > 0:
+                    entry.rounds -= 1
+                    self._slots[self._cursor].append(entry)
+                else:
+                    due.append(entry)
+            if due:
+                # Run off the wheel task so a slow beat never delays the next tick
+                batch = asyncio.create_task(self._run_due(due))
+                self._batches.add(batch)
+                batch.add_done_callback(self._batches.discard)
+
+    async def _run_due(self, due: list[Heartbeat]) -> None:
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(asyncio.wait_for(entry.beat(), _BEAT_TIMEOUT_S) for entry in due),
+            return_exceptions=True,
+        )
+        _beat_ms.observe((time.perf_counter() - started) * 1000)
+        for entry, result in zip(due, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Heartbeat {entry.name} failed: {result!r}")
+            if entry.cancelled or result is False:
+                self.registered -= 1
+                continue
+            self._schedule(entry)
+
+
+heartbeat = _TimerWheel(settings.HEARTBEAT_TICK_S)
+
+gauge(
+    "heartbeat_registered",
+    "Beats registered on the shared heartbeat wheel",
+    fn=lambda: heartbeat.registered,
+)
@@ -0,0 +1,321 @@
+"""
+Job Queue Service
+-----------------
+Durable, MongoDB-backed queue for background work that must survive a
+restart — today the post-session pipeline (analysis → Tier 2 → Tier 3).
+
+Job document (jobs):
+    {
+        kind        : str,          # handler name, e.g. "post_session"
+        key         : str,          # idempotency key (unique) — enqueueing the
+                                    #   same key again is a no-op
+        payload     : dict,
+        status      : "queued" | "running" | "done" | "failed",
+        attempts    : int,          # claims so far
+        run_at      : datetime,     # not claimable before this (retry backoff)
+        lease_until : datetime,     # a running job whose lease lapsed (its
+                                    #   worker died) is claimable again
+        worker_id   : str | None,
+        done_steps  : [str],        # handler progress, kept across retries
+        last_error  : str | None,
+        created_at, updated_at, finished_at : datetime,
+    }
+
+Claiming is a single find_one_and_update, so any number of workers —
+standalone worker.py processes and/or the API process when
+JOB_WORKER_IN_PROCESS is set — can share the queue. A running job's lease is renewed on the heartbeat
+wheel every JOB_LEASE_S / 3. A failed attempt is re-queued with
+exponential backoff (JOB_RETRY_BACKOFF_S · 2^(attempt-1), capped at
+JOB_RETRY_BACKOFF_MAX_S) until JOB_MAX_ATTEMPTS, then stays `failed`.
+Handlers must tolerate running again: a lost lease means a second run.
+
+Stats: jobs_enqueued_total{kind}, jobs_finished_total{kind, outcome},
+job_wait_ms, job_run_ms and jobs_running (gauge).
+"""
+import asyncio
+import os
+import secrets
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterable
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+import app.db.mongodb as mongodb
+from app.core.config import settings
+from app.core.metrics import counter, gauge, histogram
+from app.services.heartbeat_service import heartbeat
+
+_JOBS = "jobs"
+
+Handler = Callable[[dict], Awaitable[None]]
+
+_workers: set["JobWorker"] = set()              # workers running in this process
+
+gauge(
+    "jobs_running",
+    "Jobs currently executing in this process",
+    fn=lambda: sum(len(worker._running) for worker in _workers),
+)
+_wait_ms = histogram(
+    "job_wait_ms",
+    "Time from a job becoming due until a worker claimed it",
+    buckets=(10, 100, 500, 1000, 5000, 15000, 60000, 300000, 900000),
+)
+_run_ms = histogram(
+    "job_run_ms",
+    "Duration of one job attempt",
+    buckets=(100, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000),
+)
+
+
+def _enqueued(kind: str):
+    return counter(
+        "jobs_enqueued_total",
+        "Jobs added to the durable queue (duplicates of an existing key excluded)",
+        kind=kind,
+    )
+
+
+def _finished(kind: str, outcome: str):
+    return counter(
+        "jobs_finished_total",
+        "Job attempts by outcome (done, retry, failed, released)",
+        kind=kind,
+        outcome=outcome,
+    )
+
+
+# ── Queue operations ─────────────────────────────────────────────────────────
+
+async def enqueue_job(kind: str, key: str, payload: dict) -> bool:
+    """Queue a job unless one with `key` already exists. True if it was added."""
+    db = mongodb.db
+    now = datetime.now(timezone.utc)
+    try:
+        result = await db[_JOBS].update_one(
+            {"key": key},
+            {"$setOnInsert": {
+                "kind": kind,
+                "key": key,
+                "payload": payload,
+                "status": "queued",
+                "attempts": 0,
+                "run_at": now,
+                "lease_until": None,
+                "worker_id": None,
+                "done_steps": [],
+                "last_error": None,
+                "created_at": now,
+                "updated_at": now,
+            }},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False
+    if result.upserted_id is None:
+        return False
+    _enqueued(kind).inc()
+    for worker in _workers:
+        worker.wake()
+    return True
+
+
+async def record_steps(job: dict, steps: Iterable[str]) -> None:
+    """Remember finished handler steps so a retry can skip them."""
+    steps = list(steps)
+    if not steps:
+        return
+    db = mongodb.db
+    await db[_JOBS].update_one(
+        {"_id": job["_id"]},
+        {"$addToSet": {"done_steps": {"$each": steps}}},
+    )
+
+
+async def _claim(worker_id: str, kinds: list[str]) -> dict | None:
+    db = mongodb.db
+    now = datetime.now(timezone.utc)
+    return await db[_JOBS].find_one_and_update(
+        {
+            "kind": {"$in": kinds},
+            "$or": [
+                {"status": "queued", "run_at": {"$lte": now}},
+                {"status": "running", "lease_until": {"$lt": now}},
+            ],
+        },
+        {
+            "$set": {
+                "status": "running",
+                "worker_id": worker_id,
+                "lease_until": now + timedelta(seconds=settings.JOB_LEASE_S),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _settle(job: dict, fields: dict, inc: dict | None = None) -> bool:
+    """Update a job this worker still holds; False if its lease was lost."""
+    db = mongodb.db
+    update = {"$set": {**fields, "updated_at": datetime.now(timezone.utc)}}
+    if inc:
+        update["$inc"] = inc
+    result = await db[_JOBS].update_one(
+        {"_id": job["_id"], "worker_id": job["worker_id"], "status": "running"},
+        update,
+    )
+    return result.matched_count == 1
+
+
+def _backoff_s(attempts: int) -> float:
+    return min(
+        settings.JOB_RETRY_BACKOFF_MAX_S,
+        settings.JOB_RETRY_BACKOFF_S * 2 ** max(0, attempts - 1),
+    )
+
+
+# ── Worker ───────────────────────────────────────────────────────────────────
+
+class JobWorker:
+    """Claims and runs jobs for the kinds in `handlers`, a few at a time."""
+
+    def __init__(
+        self,
+        handlers: dict[str, Handler],
+        concurrency: int | None = None,
+    ) -> None:
+        self.handlers = handlers
+        self.concurrency = max(1, concurrency or settings.JOB_WORKER_CONCURRENCY)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(3)}"
+        self._running: dict[asyncio.Task, dict] = {}
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            _workers.add(self)
+            self._task = asyncio.create_task(self._claim_loop(), name="job-worker")
+            print(f"👷 Job worker {self.worker_id} started ({self.concurrency} at a time)")
+
+    def wake(self) -> None:
+        """A job was enqueued — claim now instead of at the next poll."""
+        self._wake.set()
+
+    async def stop(self, timeout: float) -> None:
+        """Stop claiming, give running jobs `timeout` seconds, re-queue the rest."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self._running:
+            print(f"⏳ Waiting up to {timeout:.0f}s for {len(self._running)} job(s)…")
+            await asyncio.wait(list(self._running), timeout=timeout)
+        unfinished = dict(self._running)
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+        for job in unfinished.values():
+            # Not the job's fault — hand it back without spending an attempt
+            try:
+                if await _settle(
+                    job,
+                    {"status": "queued", "run_at": datetime.now(timezone.utc), "worker_id": None},
+                    inc={"attempts": -1},
+                ):
+                    _finished(job["kind"], "released").inc()
+            except Exception as e:
+                print(f"⚠️  Could not release job {job['key']}: {e}")
+        if unfinished:
+            print(f"📝 {len(unfinished)} job(s) handed back to the queue")
+        _workers.discard(self)
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    async def _claim_loop(self) -> None:
+        kinds = list(self.handlers)
+        while True:
+            if len(self._running) >= self.concurrency:
+                await asyncio.wait(list(self._running), return_when=asyncio.FIRST_COMPLETED)
+                continue
+            self._wake.clear()
+            try:
+                job = await _claim(self.worker_id, kinds)
+            except Exception as e:
+                print(f"⚠️  Job claim failed: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), settings.JOB_POLL_INTERVAL_S)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.create_task(self._execute(job), name=f"job-{job['key']}")
+            self._running[task] = job
+            task.add_done_callback(lambda done: self._running.pop(done, None))
+
+    async def _execute(self, job: dict) -> None:
+        kind = job["kind"]
+        due_at = job["run_at"].replace(tzinfo=timezone.utc)  # Motor returns naive UTC
+        _wait_ms.observe(max(0.0, (datetime.now(timezone.utc) - due_at).total_seconds() * 1000))
+        if job["attempts"] > settings.JOB_MAX_ATTEMPTS:
+            # Claimed again after its worker died on the final attempt
+            await _settle(job, {"status": "failed", "finished_at": datetime.now(timezone.utc)})
+            _finished(kind, "failed").inc()
+            return
+
+        async def renew() -> bool:
+            return await _settle(job, {
+                "lease_until": datetime.now(timezone.utc) + timedelta(seconds=settings.JOB_LEASE_S),
+            })
+
+        lease = heartbeat.register(renew, settings.JOB_LEASE_S / 3, name=f"lease-{job['key']}")
+        started = time.perf_counter()
+        error: Exception | None = None
+        try:
+            await self.handlers[kind](job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            lease.cancel()
+            _run_ms.observe((time.perf_counter() - started) * 1000)
+        try:
+            if error is not None:
+                await self._retry_or_fail(job, error)
+            elif await _settle(job, {
+                "status": "done", "finished_at": datetime.now(timezone.utc), "last_error": None,
+            }):
+                _finished(kind, "done").inc()
+        except Exception as e:
+            # The lease lapses and another attempt picks the job up
+            print(f"⚠️  Could not record the outcome of job {job['key']}: {e}")
+
+    async def _retry_or_fail(self, job: dict, error: Exception) -> None:
+        kind, attempts = job["kind"], job["attempts"]
+        now = datetime.now(timezone.utc)
+        if attempts >= settings.JOB_MAX_ATTEMPTS:
+            print(f"❌ Job {job['key']} failed for good after {attempts} attempts: {error}")
+            settled = await _settle(job, {
+                "status": "failed", "finished_at": now, "last_error": str(error)[:500],
+            })
+            outcome = "failed"
+        else:
+            delay = _backoff_s(attempts)
+            print(f"⚠️  Job {job['key']} attempt {attempts} failed, retrying in {delay:.0f}s: {error}")
+            settled = await _settle(job, {
+                "status": "queued",
+                "run_at": now + timedelta(seconds=delay),
+                "worker_id": None,
+                "last_error": str(error)[:500],
+            })
+            outcome = "retry"
+        if settled:
+            _finished(kind, outcome).inc()
@@ -4,12 +4,24 @@ LLM Service
 Groq-powered streaming response generation.
 
 Performance architecture:
-  - The Groq SDK returns a *synchronous* blocking iterator. Running it
-    directly inside an async function freezes the entire event loop.
-  - Fix: run it in a ThreadPoolExecutor so the event loop stays free.
-  - Sentences are pushed onto an asyncio.Queue the moment they complete.
-  - A concurrent TTS consumer drains that queue immediately.
+  - The async Groq client streams the completion on the event loop itself —
+    no worker threads, so concurrent turns are bounded by the network, not
+    by a fixed pool size.
+  - A producer task pushes text onto an asyncio.Queue as it is generated;
+    a concurrent TTS consumer drains that queue immediately.
   - Effect: TTS starts on sentence 1 while the LLM generates sentence 2.
+  - Text is handed to a TTSPipeline, which keeps up to TTS_PIPELINE_DEPTH
+    segments in flight so multi-sentence replies play back without gaps.
+  - With TTS_STREAM_TOKENS, tokens are forwarded to Deepgram as they arrive
+    and Flush is sent only at sentence boundaries (plus one optional early
+    flush after the first clause), cutting time-to-first-audio.
+  - Barge-in: cancelling the turn cancels the producer task, which closes
+    the upstream HTTP stream right away. Tokens read but never spoken are
+    counted in llm_wasted_upstream_tokens_total.
+  - Speculation (LLM_SPECULATIVE): ws.py may start a SpeculativeTurn on a
+    stable interim transcript before the gate fires. If the final input
+    matches, its already-running stream becomes the turn's producer; if not,
+    it is cancelled and its tokens are counted as speculative waste.
 
 Memory architecture:
   - conversation_history contains ONLY the current session's messages (RAM).
@@ -19,94 +31,291 @@ Memory architecture:
 """
 import asyncio
 import json
-from concurrent.futures import ThreadPoolExecutor
+import re
+import time
 from typing import List
 
-from groq import Groq
+from groq import AsyncGroq
 
 from app.services.memory_mongo_service import get_all_memories_text
-from app.services.tts_service import send_buffer_to_tts, TTSSession
+from app.services.tts_service import TTSPipeline, TTSSession
 
+from app.core.config import settings
 from app.core.lila_prompt import LILA_SYSTEM_PROMPT
+from app.core.metrics import counter, gauge, histogram
+from app.core.turn_trace import TurnTrace
 
-groq_client = Groq()
-
-# Shared thread pool — keeps all blocking Groq calls off the event loop
-_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="groq")
+groq_client = AsyncGroq()
 
 # Poison-pill pushed onto the queue to signal end-of-stream
 _SENTINEL = object()
 
+# Tokens Groq generated for turns that were cancelled before they were spoken
+_wasted_tokens = counter(
+    "llm_wasted_upstream_tokens_total",
+    "Upstream LLM tokens read for barged-in turns but never spoken",
+)
+
+# Groq completions currently streaming (replaces the old executor busy count)
+_streams_in_flight = gauge(
+    "llm_streams_in_flight",
+    "Groq completion streams currently open",
+)
+
+_speculative_wasted_tokens = counter(
+    "llm_speculative_wasted_tokens_total",
+    "Upstream LLM tokens read for discarded speculative completions",
+)
+_speculation_saved_ms = histogram(
+    "llm_speculation_saved_ms",
+    "Head start of committed speculative completions (request sent before the gate)",
+)
+
+
+def _speculations(outcome: str):
+    return counter(
+        "llm_speculations_total",
+        "Speculative completions by outcome (hit = committed, miss = transcript "
+        "diverged, abandoned = turn or session ended first)",
+        outcome=outcome,
+    )
+
+
 _MEMORY_KEYWORDS = [
     "remember", "told you", "earlier", "before",
     "said", "mentioned", "what do you know", "recall",
     "my name", "i said", "we talked", "what did i",
 ]
 
-def _stream_groq_to_queue(
+class TurnUsage:
+    """Per-turn upstream token accounting, used to measure barge-in waste."""
+
+    def __init__(self) -> None:
+        self.tokens_read: int = 0      # content chunks received from Groq
+        self.tokens_spoken: int = 0    # tokens of sentences that fully reached TTS
+
+    @property
+    def tokens_wasted(self) -> int:
+        return max(0, self.tokens_read - self.tokens_spoken)
+
+
+# Sentence-ending and clause-ending punctuation used to place TTS flushes
+_SENTENCE_ENDINGS = (".", "?", "!", ";")
+_CLAUSE_ENDINGS = (",", ":", "—", "–")
+
+
+async def _stream_groq_to_queue(
     messages: list,
     sentence_queue: asyncio.Queue,
-    loop: asyncio.AbstractEventLoop,
+    usage: TurnUsage,
+    trace: TurnTrace,
 ) -> str:
     """
-    Runs inside a ThreadPoolExecutor thread — never on the event loop thread.
-    Calls the blocking Groq sync iterator, splits tokens into sentences,
-    and pushes each completed sentence onto `sentence_queue` immediately.
-    Returns the full response string.
+    Producer task — runs on the event loop.
+    Streams the Groq completion and pushes (text, token_count, flush) tuples
+    onto `sentence_queue`; `flush` marks a TTS segment boundary.
+
+    TTS_STREAM_TOKENS on  → every token is pushed the moment it arrives, so
+                            Deepgram receives text while the LLM is still
+                            generating the sentence.
+    TTS_STREAM_TOKENS off → text is held back and pushed one sentence at a time.
+
+    Boundaries fall on sentence endings, plus one early boundary after the
+    first clause once it reaches TTS_EARLY_FLUSH_CHARS characters, which cuts
+    time-to-first-audio on long opening sentences.
+
+    _SENTINEL is always pushed last so the consumer never waits on a producer
+    that has failed. Returns the full response string.
+
+    Cancelling the task closes the upstream HTTP stream immediately.
     """
+    stream_tokens = settings.TTS_STREAM_TOKENS
+    early_flush_chars = settings.TTS_EARLY_FLUSH_CHARS
     full_response = ""
-    sentence_buffer = ""
-
-    response = groq_client.chat.completions.create(
-        messages=messages,
-        model="meta-llama/llama-4-scout-17b-16e-instruct",
-        temperature=0.8,
-        max_tokens=150,
-        stream=True,
-    )
+    segment = ""            # text since the last flush boundary
+    held = ""               # text not yet pushed (sentence mode only)
+    held_tokens = 0
+    flushed_once = False
 
-    for chunk in response:
-        token = chunk.choices[0].delta.content if chunk.choices[0].delta else ""
-        if token:
-            sentence_buffer += token
-            full_response += token
-            print(token, end="", flush=True)
-
-            if sentence_buffer.rstrip().endswith((".", "?", "!", ";")):
-                asyncio.run_coroutine_threadsafe(
-                    sentence_queue.put(sentence_buffer.strip()), loop
-                ).result()
-                sentence_buffer = ""
-
-    # Flush any trailing text that lacks sentence-ending punctuation
-    if sentence_buffer.strip():
-        asyncio.run_coroutine_threadsafe(
-            sentence_queue.put(sentence_buffer.strip()), loop
-        ).result()
-
-    # Signal the async consumer that the stream is done
-    asyncio.run_coroutine_threadsafe(
-        sentence_queue.put(_SENTINEL), loop
-    ).result()
+    _streams_in_flight.inc()
+    try:
+        trace.mark("llm_request_sent")
+        response = await groq_client.chat.completions.create(
+            messages=messages,
+            model="meta-llama/llama-4-scout-17b-16e-instruct",
+            temperature=0.8,
+            max_tokens=150,
+            stream=True,
+        )
+        try:
+            async for chunk in response:
+                token = chunk.choices[0].delta.content if chunk.choices[0].delta else ""
+                if not token:
+                    continue
+                trace.mark("first_token")
+                usage.tokens_read += 1
+                full_response += token
+                segment += token
+                print(token, end="", flush=True)
+
+                tail = segment.rstrip()
+                flush = tail.endswith(_SENTENCE_ENDINGS) or (
+                    not flushed_once
+                    and early_flush_chars > 0
+                    and len(tail) >= early_flush_chars
+                    and tail.endswith(_CLAUSE_ENDINGS)
+                )
+                if flush:
+                    segment = ""
+                    flushed_once = True
+                    trace.mark("first_sentence_queued")
+
+                if stream_tokens:
+                    sentence_queue.put_nowait((token, 1, flush))
+                else:
+                    held += token
+                    held_tokens += 1
+                    if flush:
+                        sentence_queue.put_nowait((held, held_tokens, True))
+                        held, held_tokens = "", 0
+        finally:
+            # Releases the HTTP connection at once on barge-in
+            await response.close()
+
+        # Flush any trailing text that lacks sentence-ending punctuation
+        if held.strip():
+            sentence_queue.put_nowait((held, held_tokens, True))
+        elif stream_tokens and segment.strip():
+            sentence_queue.put_nowait(("", 0, True))
+    finally:
+        _streams_in_flight.dec()
+        # Signal the consumer that the stream is done (or has failed)
+        sentence_queue.put_nowait(_SENTINEL)
 
     return full_response
 
 
+async def _build_messages(
+    user_input: str,
+    conversation_history: list,
+    google_id: str | None,
+    user_imprints: List[dict] | None,
+    memories_text: str | None,
+) -> list:
+    """System prompt + current-session history + the new user message."""
+    # ── Build system prompt ───────────────────────────────────────────────────
+    system_prompt = LILA_SYSTEM_PROMPT
+
+    # Tier 3: ALWAYS inject imprints (points) if they exist
+    if user_imprints:
+        points_text = "\n".join(
+            f"- {p.get('type', '')} {p.get('point', '')}"
+            for p in user_imprints
+        )
+        system_prompt += (
+            "\n\n[What you know about this person — treat as implicit "
+            "background, do not reference directly unless it naturally "
+            "comes up]:\n" + points_text
+        )
+
+    # Tier 2: inject memory ONLY when the user's words trigger recall
+    needs_memory = any(kw in user_input.lower() for kw in _MEMORY_KEYWORDS)
+    if needs_memory and google_id:
+        if memories_text is None:
+            memories_text = await get_all_memories_text(google_id)
+        if memories_text:
+            system_prompt += (
+                f"\n\n[Your memory of past conversations]:\n"
+                f"{memories_text}"
+            )
+
+    return (
+        [{"role": "system", "content": system_prompt}]
+        + conversation_history
+        + [{"role": "user", "content": user_input}]
+    )
+
+
+def _normalise(text: str) -> str:
+    """Transcript comparison key — case, punctuation and spacing ignored."""
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+
+class SpeculativeTurn:
+    """
+    A Groq completion started on a stable interim transcript, before the
+    utterance gate has fired. It streams into its own queue until
+    send_llm_response either commits it (final input matches) or discards it.
+    """
+
+    def __init__(self, user_input: str, messages: list) -> None:
+        self.user_input = user_input
+        self.key = _normalise(user_input)
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.usage = TurnUsage()
+        self.trace = TurnTrace()
+        self.started_at = time.perf_counter()
+        self.settled = False           # committed or discarded
+        self.producer = asyncio.create_task(
+            _stream_groq_to_queue(messages, self.queue, self.usage, self.trace)
+        )
+
+    @classmethod
+    async def start(
+        cls,
+        user_input: str,
+        conversation_history: list,
+        google_id: str | None = None,
+        user_imprints: List[dict] | None = None,
+        memories_text: str | None = None,
+    ) -> "SpeculativeTurn":
+        messages = await _build_messages(
+            user_input, conversation_history, google_id, user_imprints, memories_text,
+        )
+        return cls(user_input, messages)
+
+    def matches(self, user_input: str) -> bool:
+        return _normalise(user_input) == self.key
+
+    def commit(self) -> None:
+        """send_llm_response takes over the stream."""
+        self.settled = True
+        _speculations("hit").inc()
+
+    def discard(self, outcome: str = "miss") -> None:
+        """
+        Cancel the upstream stream and count its tokens as wasted. `outcome`
+        is "miss" when the transcript diverged, "abandoned" when the turn or
+        session ended before the speculation could be judged. No-op once
+        committed or discarded.
+        """
+        if self.settled:
+            return
+        self.settled = True
+        self.producer.cancel()
+        _speculations(outcome).inc()
+        if self.usage.tokens_read:
+            _speculative_wasted_tokens.inc(self.usage.tokens_read)
+
+
 async def send_llm_response(
     user_input: str,
     websocket,
     conversation_history: list,
     current_session_history: list,
-    tts_ws,
     tts_session: "TTSSession",
     google_id: str = None,
     user_imprints: List[dict] | None = None,
+    memories_text: str | None = None,
+    trace: TurnTrace | None = None,
+    speculation: SpeculativeTurn | None = None,
 ) -> None:
     """
     Generate and stream an LLM response for `user_input`.
-    Groq runs in a thread; TTS drains the sentence queue concurrently.
+    Groq streams in a producer task; TTS drains the sentence queue concurrently.
     Supports barge-in cancellation via asyncio.CancelledError.
-    tts_session is a per-connection TTSSession (lock + task ref).
+    tts_session is a per-connection TTSSession (lock + task ref); it owns
+    the Deepgram TTS socket and reconnects it on its own.
 
     conversation_history    — full current-session messages fed to the LLM.
                               Starts empty each session; never trimmed — Lila
@@ -116,63 +325,71 @@ async def send_llm_response(
                               the LLM context list.
     user_imprints           — Tier 3 points loaded at session start, always
                               injected into the system prompt.
+    memories_text           — Tier 2 prose preloaded at session start; fetched
+                              on demand when None.
+    trace                   — per-turn latency trace; stages are marked as the
+                              turn progresses and recorded when it ends.
+    speculation             — completion already started on an interim
+                              transcript; committed if it matches user_input,
+                              discarded otherwise.
     """
+    trace = trace or TurnTrace()
+
+    if speculation is not None and speculation.matches(user_input):
+        # ── Commit: the speculative stream becomes this turn's producer ──────
+        saved_ms = (trace.marks.get("gate_decision", time.perf_counter()) - speculation.started_at) * 1000
+        speculation.commit()
+        _speculation_saved_ms.observe(saved_ms)
+        print(f"🔮 Speculation hit — request sent {saved_ms:.0f} ms before the gate")
+        speculation.trace.rebase(trace)
+        trace = speculation.trace
+        sentence_queue = speculation.queue
+        usage = speculation.usage
+        producer = speculation.producer
+    else:
+        if speculation is not None:
+            print("🔮 Speculation miss — discarded")
+            speculation.discard()
+        messages = await _build_messages(
+            user_input, conversation_history, google_id, user_imprints, memories_text,
+        )
+        sentence_queue = asyncio.Queue()
+        usage = TurnUsage()
+        # ── Producer: Groq streams on the event loop — no thread hop ─────────
+        producer = asyncio.create_task(
+            _stream_groq_to_queue(messages, sentence_queue, usage, trace)
+        )
+
     conversation_history.append({"role": "user", "content": user_input})
     current_session_history.append({"role": "user", "content": user_input})
     # No trim — Lila always receives the full current-session history.
     # Llama 4 Scout has a 10M token context window; a single voice session
     # will never approach that limit.
 
-    # ── Build system prompt ───────────────────────────────────────────────────
-    system_prompt = LILA_SYSTEM_PROMPT
-
-    # Tier 3: ALWAYS inject imprints (points) if they exist
-    if user_imprints:
-        points_text = "\n".join(
-            f"- {p.get('type', '')} {p.get('point', '')}"
-            for p in user_imprints
-        )
-        system_prompt += (
-            "\n\n[What you know about this person — treat as implicit "
-            "background, do not reference directly unless it naturally "
-            "comes up]:\n" + points_text
-        )
-
-    # Tier 2: inject memory ONLY when the user's words trigger recall
-    needs_memory = any(kw in user_input.lower() for kw in _MEMORY_KEYWORDS)
-    if needs_memory and google_id:
-        memories_text = await get_all_memories_text(google_id)
-        if memories_text:
-            system_prompt += (
-                f"\n\n[Your memory of past conversations]:\n"
-                f"{memories_text}"
-            )
-
-    messages = [{"role": "system", "content": system_prompt}] + conversation_history
-    sentence_queue: asyncio.Queue = asyncio.Queue()
-    loop = asyncio.get_event_loop()
+    segment_tokens: list[int] = []    # token count of each segment flushed to TTS
+    tts: TTSPipeline | None = None
 
     try:
-        # ── Producer: Groq runs in a thread — event loop stays responsive ────
-        groq_future = loop.run_in_executor(
-            _executor,
-            _stream_groq_to_queue,
-            messages,
-            sentence_queue,
-            loop,
-        )
-
-        # ── Consumer: drain sentences → TTS the moment each one arrives ───────
+        # ── Consumer: drain text → TTS the moment it arrives ──────────────────
         full_response = ""
-        while True:
-            sentence = await sentence_queue.get()
-            if sentence is _SENTINEL:
-                break
-            full_response += sentence + " "
-            await send_buffer_to_tts(sentence, websocket, tts_ws, tts_session)
+        pending_tokens = 0
+        async with TTSPipeline(
+            websocket, tts_session, settings.TTS_PIPELINE_DEPTH, trace,
+        ) as tts:
+            while True:
+                item = await sentence_queue.get()
+                if item is _SENTINEL:
+                    break
+                text, tokens, flush = item
+                full_response += text
+                pending_tokens += tokens
+                await tts.speak(text)
+                if flush and await tts.flush():
+                    segment_tokens.append(pending_tokens)
+                    pending_tokens = 0
 
-        # Ensure the producer thread has fully exited
-        await groq_future
+        # Re-raises any upstream error that ended the stream early
+        await producer
 
         # Append assistant turn to both history lists (RAM only — no DB write)
         conversation_history.append({"role": "assistant", "content": full_response.strip()})
@@ -180,10 +397,24 @@ async def send_llm_response(
         print(f"\n💬 Turn complete ({len(current_session_history)} messages this session)")
 
     except asyncio.CancelledError:
-        print("\n🛑 LLM response cancelled (barge-in)")
+        # Stop the producer and close the Groq stream right away —
+        # nobody will drain the queue for this turn any more.
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+        if tts is not None:
+            usage.tokens_spoken = sum(segment_tokens[:tts.completed])
+        if usage.tokens_wasted:
+            _wasted_tokens.inc(usage.tokens_wasted)
+        print(f"\n🛑 LLM response cancelled (barge-in, {usage.tokens_wasted} tokens wasted)")
         await websocket.send_text(json.dumps({"response": "[interrupted]"}))
         raise
 
     except Exception as e:
+        # Same teardown as a barge-in: close the stream, retrieve its outcome
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
         print(f"\n❌ LLM error: {e}")
         await websocket.send_text(json.dumps({"response": "Sorry, I had a glitch."}))
+
+    finally:
+        trace.finish()
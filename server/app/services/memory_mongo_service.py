@@ -3,27 +3,49 @@ Memory service for MongoDB operations.
 
 Three-tier memory architecture
 ──────────────────────────────
-  Tier 1 — conversations  : full session transcript, one document per session.
+  Tier 1 — conversations  : session transcript — a header document per session
+                            plus fixed-size turn chunks in conversation_chunks.
   Tier 2 — memories        : per-session prose summary (~150-200 tokens), one document per session.
   Tier 3 — imprints        : structured stable-fact points, one document per user (max 20 points).
 
-Conversation document schema:
+Tier 1 is bucketed so long sessions never approach the 16 MB document
+limit and readers stream a session chunk by chunk.
+
+Conversation header document (conversations):
+    {
+        google_id     : str,
+        session_id    : str,
+        started_at    : datetime,
+        updated_at    : datetime,
+        history_count : int,      # messages in the session
+        chunk_size    : int,      # CONVERSATION_CHUNK_TURNS when created
+        chunk_count   : int,
+    }
+
+Turn chunk document (conversation_chunks), unique on (google_id, session_id, seq):
     {
-        google_id   : str,
-        session_id  : str,
-        started_at  : datetime,
-        updated_at  : datetime,
-        history     : [
-            {"role": "user"|"assistant", "content": "..."},
-            ...
-        ]
+        google_id  : str,
+        session_id : str,
+        seq        : int,         # 0, 1, 2, … in conversation order
+        turns      : [{"role": "user"|"assistant", "content": "..."}, ...],
+        count      : int,         # len(turns) ≤ chunk_size; guards appends
+        created_at : datetime,
     }
+
+Legacy headers without `chunk_size` embed the whole `history` array; the
+readers below serve them unchanged.
 """
+from pymongo import ReplaceOne
+from pymongo.errors import DuplicateKeyError
+
 import app.db.mongodb as mongodb
+from app.core.config import settings
 from app.models.memory import SessionMemory
 from app.models.imprints import UserImprints
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
+
+_CHUNKS = "conversation_chunks"
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -146,18 +168,57 @@ async def save_session_history(
     history: List[dict],
 ) -> None:
     """
-    Upsert the full transcript for a specific session.
-    Called once when the WebSocket session ends (RAM → DB).
+    Rewrite the full transcript for a specific session as chunks.
+    Used to resync when an incremental append finds the stored transcript
+    out of step (see append_session_turns); also migrates a legacy
+    embedded-history document to the chunked layout.
+
+    Never deletes before writing: chunks are replaced in place by seq, in
+    order, then only the stale seqs past the end are removed. A crash
+    part-way leaves each chunk either old or rewritten — history is
+    append-only, so nothing stored is lost — and the next resync finishes
+    the job. A legacy header keeps its embedded history until the chunks
+    are complete.
     """
     db = mongodb.db
     now = datetime.now(timezone.utc)
+    size = settings.CONVERSATION_CHUNK_TURNS
+    chunks = [
+        {
+            "google_id": google_id,
+            "session_id": session_id,
+            "seq": seq,
+            "turns": history[start:start + size],
+            "count": len(history[start:start + size]),
+            "created_at": now,
+        }
+        for seq, start in enumerate(range(0, len(history), size))
+    ]
+    if chunks:
+        await db[_CHUNKS].bulk_write(
+            [
+                ReplaceOne(
+                    {"google_id": google_id, "session_id": session_id, "seq": chunk["seq"]},
+                    chunk,
+                    upsert=True,
+                )
+                for chunk in chunks
+            ],
+            ordered=True,
+        )
+    await db[_CHUNKS].delete_many(
+        {"google_id": google_id, "session_id": session_id, "seq": {"$gte": len(chunks)}}
+    )
     await db["conversations"].update_one(
         {"google_id": google_id, "session_id": session_id},
         {
             "$set": {
-                "history": history,
+                "history_count": len(history),
+                "chunk_size": size,
+                "chunk_count": len(chunks),
                 "updated_at": now,
             },
+            "$unset": {"history": ""},
             "$setOnInsert": {
                 "google_id": google_id,
                 "session_id": session_id,
@@ -168,23 +229,114 @@ async def save_session_history(
     )
 
 
-async def get_all_conversation_history(
+async def append_session_turns(
     google_id: str,
-) -> List[dict]:
+    session_id: str,
+    started_at: datetime,
+    turns: List[dict],
+    offset: int,
+) -> bool:
     """
-    Aggregate ALL messages across ALL sessions for a user.
-    Used by Tier 3 refactoring (requires full history).
+    $push `turns` onto a session's transcript, which must already hold
+    exactly `offset` messages (the first batch creates the header).
 
-    WARNING: For power users this will be large. Deferred optimisation.
+    Turns land in the chunk(s) covering positions offset… — each chunk
+    write is guarded by the chunk's own message count, so a retried write
+    is a no-op instead of a duplicate. Returns False when the stored
+    transcript is not at `offset` — e.g. an earlier write succeeded but its
+    reply was lost, or the session has a legacy embedded-history document —
+    and the caller should resync with save_session_history.
     """
     db = mongodb.db
-    cursor = db["conversations"].find(
+    now = datetime.now(timezone.utc)
+    size = settings.CONVERSATION_CHUNK_TURNS
+    index, end = offset, offset + len(turns)
+    try:
+        while index < end:
+            seq, position = divmod(index, size)
+            piece = turns[index - offset:index - offset + size - position]
+            result = await db[_CHUNKS].update_one(
+                {"google_id": google_id, "session_id": session_id, "seq": seq, "count": position},
+                {
+                    "$push": {"turns": {"$each": piece}},
+                    "$inc": {"count": len(piece)},
+                    "$setOnInsert": {"created_at": now},
+                },
+                upsert=position == 0,
+            )
+            if not (result.matched_count or result.upserted_id is not None):
+                return False
+            index += len(piece)
+
+        result = await db["conversations"].update_one(
+            {"google_id": google_id, "session_id": session_id, "chunk_size": {"$exists": True}},
+            {
+                "$max": {"history_count": end, "chunk_count": (end - 1) // size + 1},
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"started_at": started_at, "chunk_size": size},
+            },
+            upsert=offset == 0,
+        )
+    except DuplicateKeyError:
+        return False
+    return result.matched_count == 1 or result.upserted_id is not None
+
+
+async def get_session_header(google_id: str, session_id: str) -> Optional[dict]:
+    """The conversations document for a session (embeds history only if legacy)."""
+    db = mongodb.db
+    return await db["conversations"].find_one(
+        {"google_id": google_id, "session_id": session_id},
+        {"_id": 0},
+    )
+
+
+async def iter_session_history(
+    google_id: str,
+    session_id: str,
+    header: Optional[dict] = None,
+) -> AsyncIterator[dict]:
+    """
+    Stream one session's messages in order, chunk by chunk.
+    Pass `header` when it was already fetched; legacy documents that embed
+    `history` are served from the header itself.
+    """
+    if header is None:
+        header = await get_session_header(google_id, session_id)
+        if header is None:
+            return
+    if "chunk_size" not in header:
+        for message in header.get("history", []):
+            yield message
+        return
+    db = mongodb.db
+    cursor = db[_CHUNKS].find(
+        {"google_id": google_id, "session_id": session_id},
+        {"turns": 1, "_id": 0},
+    ).sort("seq", 1)
+    async for chunk in cursor:
+        for message in chunk.get("turns", []):
+            yield message
+
+
+async def iter_conversation_history(google_id: str) -> AsyncIterator[dict]:
+    """Stream ALL messages across ALL of a user's sessions, chronologically."""
+    db = mongodb.db
+    headers = db["conversations"].find(
         {"google_id": google_id},
-        {"history": 1, "started_at": 1},
+        {"_id": 0, "session_id": 1, "history": 1, "chunk_size": 1},
     ).sort("started_at", 1)  # chronological
+    async for header in headers:
+        async for message in iter_session_history(google_id, header["session_id"], header):
+            yield message
 
-    sessions = await cursor.to_list(length=None)
-    combined: List[dict] = []
-    for session in sessions:
-        combined.extend(session.get("history", []))
-    return combined
+
+async def get_all_conversation_history(
+    google_id: str,
+) -> List[dict]:
+    """
+    Aggregate ALL messages across ALL sessions for a user.
+    Used by Tier 3 refactoring (requires full history). Chunks are streamed
+    from MongoDB; only the combined message list is held in memory.
+    """
+    return [message async for message in iter_conversation_history(google_id)]
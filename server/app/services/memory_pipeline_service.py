@@ -1,7 +1,9 @@
 """
 Memory Pipeline Service
 -----------------------
-Runs after every WebSocket session ends (fire-and-forget from ws.py).
+Runs after every WebSocket session ends, as a durable `post_session` job
+(job_queue_service) — run by worker.py, or in the API process when
+JOB_WORKER_IN_PROCESS is set.
 
 Pipeline order
 ──────────────
@@ -22,27 +24,37 @@ Design notes
 ────────────
 - All Gemini calls run in a ThreadPoolExecutor so the event loop stays free.
 - Uses response_mime_type="application/json" for guaranteed-parseable output.
-- Never raises to caller — the pipeline is fire-and-forget from ws.py.
+- Never raises to caller — it returns the steps that failed, and the job
+  queue retries only those (with backoff).
 - Analysis runs concurrently with Tier 2 + 3 (independent task).
 """
 from __future__ import annotations
 
 import asyncio
 import json
-from typing import List
+from typing import Iterable, List
 
 from google import genai
 from google.genai import types as genai_types
 
 from app.core.config import settings
+from app.core.metrics import gauge
 from app.services.memory_mongo_service import (
     get_all_memories_text,
     save_session_memory,
     get_imprints_for_user,
     save_imprints_for_user,
     get_all_conversation_history,
+    iter_session_history,
 )
 from app.services.analysis_service import run_analysis_for_session
+from app.services.job_queue_service import enqueue_job, record_steps
+
+
+_pipelines_in_flight = gauge(
+    "post_session_pipelines_in_flight",
+    "Post-session pipelines currently running",
+)
 
 
 # ── Gemini client ─────────────────────────────────────────────────────────────
@@ -444,20 +456,24 @@ async def run_tier3_refactoring(
 # Pipeline orchestrator
 # ══════════════════════════════════════════════════════════════════════════════
 
+PIPELINE_STEPS: tuple[str, ...] = ("analysis", "tier2", "tier3")
+
+
 async def run_post_session_pipeline(
     google_id: str,
     session_id: str,
     current_session_history: List[dict],
     session_started_at=None,
-) -> None:
+    steps: Iterable[str] = PIPELINE_STEPS,
+) -> List[str]:
     """
-    Fire-and-forget pipeline executed after every session ends.
+    Pipeline executed after every session ends; returns the steps that failed.
     Tier 1 must already be saved to DB before this is called.
 
     Analysis, Tier 2, and Tier 3 have no data dependencies on each other
     (all three only need Tier 1, which is already persisted) so they run
     concurrently via asyncio.gather. Total latency ≈ slowest single call,
-    not the sum of all three.
+    not the sum of all three. A retry passes only the failed `steps`.
     """
     print(f"\n🧠 Post-session pipeline starting for session {session_id[:8]}…")
 
@@ -465,18 +481,21 @@ async def run_post_session_pipeline(
 
     if not transcript.strip():
         print(f"⚠️  Empty transcript for session {session_id[:8]}, skipping pipeline")
-        return
+        return []
 
     # ── Isolated async helpers — each catches its own exceptions ─────────────
 
-    async def _run_analysis():
+    async def _run_analysis() -> bool:
         try:
-            await run_analysis_for_session(google_id, session_id)
+            if not await run_analysis_for_session(google_id, session_id):
+                return False
             print(f"✅ Analysis complete for session {session_id[:8]}")
+            return True
         except Exception as e:
             print(f"❌ Analysis failed for session {session_id[:8]}: {e}")
+            return False
 
-    async def _run_tier2():
+    async def _run_tier2() -> bool:
         try:
             existing_memories_str = await get_all_memories_text(google_id)
             new_summary = await run_tier2_summarization(
@@ -486,10 +505,12 @@ async def run_post_session_pipeline(
                 google_id, session_id, new_summary, session_started_at,
             )
             print(f"✅ Tier 2 memory saved for session {session_id[:8]}")
+            return True
         except Exception as e:
             print(f"❌ Tier 2 memory failed for session {session_id[:8]}: {e}")
+            return False
 
-    async def _run_tier3():
+    async def _run_tier3() -> bool:
         try:
             existing_imprints = await get_imprints_for_user(google_id)
             existing_points = [
@@ -511,11 +532,66 @@ async def run_post_session_pipeline(
                 f"✅ Tier 3 imprints updated for {google_id} "
                 f"(session {session_id[:8]}, {len(new_points)} points)"
             )
+            return True
         except Exception as e:
             print(f"❌ Tier 3 imprints failed for session {session_id[:8]}: {e}")
+            return False
 
+    runners = {"analysis": _run_analysis, "tier2": _run_tier2, "tier3": _run_tier3}
+    wanted = set(steps)
+    selected = [step for step in PIPELINE_STEPS if step in wanted]
+    _pipelines_in_flight.inc()
     try:
-        await asyncio.gather(_run_analysis(), _run_tier2(), _run_tier3())
+        results = await asyncio.gather(*(runners[step]() for step in selected))
+    finally:
+        _pipelines_in_flight.dec()
+    failed = [step for step, ok in zip(selected, results) if not ok]
+    if failed:
+        print(f"❌ Post-session pipeline for session {session_id[:8]} failed: {', '.join(failed)}")
+    else:
         print(f"✅ Post-session pipeline complete for session {session_id[:8]}")
-    except Exception as e:
-        print(f"❌ Post-session pipeline failed for session {session_id[:8]}: {e}")
+    return failed
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Durable job (job_queue_service)
+# ══════════════════════════════════════════════════════════════════════════════
+
+POST_SESSION_JOB = "post_session"
+
+
+async def enqueue_post_session_pipeline(
+    google_id: str,
+    session_id: str,
+    session_started_at=None,
+) -> bool:
+    """Queue the pipeline for a finished session (once per session)."""
+    return await enqueue_job(
+        POST_SESSION_JOB,
+        f"{POST_SESSION_JOB}:{google_id}:{session_id}",
+        {
+            "google_id": google_id,
+            "session_id": session_id,
+            "session_started_at": session_started_at,
+        },
+    )
+
+
+async def run_post_session_job(job: dict) -> None:
+    """
+    Job handler: run the steps this job has not finished yet, reading the
+    transcript back from Tier 1. Raises if a step failed so it is retried.
+    """
+    payload = job["payload"]
+    google_id, session_id = payload["google_id"], payload["session_id"]
+    history = [m async for m in iter_session_history(google_id, session_id)]
+    steps = [step for step in PIPELINE_STEPS if step not in job.get("done_steps", [])]
+    failed = await run_post_session_pipeline(
+        google_id, session_id, history, payload.get("session_started_at"), steps,
+    )
+    await record_steps(job, [step for step in steps if step not in failed])
+    if failed:
+        raise RuntimeError(f"pipeline steps failed: {', '.join(failed)}")
+
+
+JOB_HANDLERS = {POST_SESSION_JOB: run_post_session_job}
@@ -0,0 +1,175 @@
+"""
+Session Registry Service
+------------------------
+Keeps a dropped /ws session resumable for SESSION_RESUME_GRACE_S.
+
+Every session is registered under a resume token that the client receives
+right after connecting ({"type": "session", "resume_token": ...}). When the
+socket drops on the client side (close 1001 or 1006), ws.py suspends the session
+here instead of persisting it: the in-RAM conversation history, imprints,
+preloaded memories, pause profile and Tier 1 write-behind state are kept
+under the token. A client
+that reconnects with ?resume=<token> inside the grace period continues the
+same session_id with that state — no Tier 1 save, no post-session pipeline
+run for the fragment, no cold reload. When the grace period runs out the
+session is finished exactly as an ordinary disconnect would have been.
+
+If the client reconnects before the server has noticed the old socket is
+dead (half-open TCP), claiming the live session takes it over: the old
+connection is told to stop and suspends itself, then the new one resumes.
+
+The registry is per process: a reconnect that lands on another worker
+starts a fresh session, and this one is finished when its grace expires.
+
+Stats: sessions_suspended (gauge), sessions_resumed_total,
+sessions_expired_total.
+"""
+import asyncio
+import secrets
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from app.core.config import settings
+from app.core.metrics import counter, gauge
+
+# How long a takeover waits for the old connection to suspend itself
+_TAKEOVER_TIMEOUT_S = 5
+
+_resumed = counter(
+    "sessions_resumed_total",
+    "Client reconnects that continued a suspended session",
+)
+_expired = counter(
+    "sessions_expired_total",
+    "Suspended sessions finished after their resume grace period ran out",
+)
+
+
+class SessionState:
+    """Everything a resumed connection needs to continue a session."""
+
+    def __init__(
+        self,
+        google_id: str,
+        session_id: str,
+        session_started_at: datetime,
+        conversation_history: list,
+        current_session_history: list,
+        user_imprints: list,
+        memories_text: str | None,
+        pause_profile,
+        persister,
+    ) -> None:
+        self.google_id = google_id
+        self.session_id = session_id
+        self.session_started_at = session_started_at
+        self.conversation_history = conversation_history
+        self.current_session_history = current_session_history
+        self.user_imprints = user_imprints
+        self.memories_text = memories_text
+        self.pause_profile = pause_profile
+        self.persister = persister            # Tier1Persister — keeps its write offset
+
+
+class _Entry:
+    def __init__(self, google_id: str, on_takeover: Callable[[], None]) -> None:
+        self.google_id = google_id
+        self.on_takeover = on_takeover
+        self.state: SessionState | None = None      # set while suspended
+        self.suspended = asyncio.Event()
+        self.expiry: asyncio.TimerHandle | None = None
+        self.finish: Callable[[SessionState], Awaitable] | None = None
+
+
+_entries: dict[str, _Entry] = {}
+# finish() runs started by an expired grace period — awaited by finish_all()
+_finishing: set[asyncio.Task] = set()
+
+gauge(
+    "sessions_suspended",
+    "Dropped sessions waiting for their client to resume",
+    fn=lambda: sum(1 for entry in _entries.values() if entry.state is not None),
+)
+
+
+def register(google_id: str, on_takeover: Callable[[], None]) -> str:
+    """Register a live session; returns its resume token."""
+    token = secrets.token_urlsafe(24)
+    _entries[token] = _Entry(google_id, on_takeover)
+    return token
+
+
+def discard(token: str) -> None:
+    """The session ended for good (clean close) — forget it."""
+    entry = _entries.pop(token, None)
+    if entry is not None and entry.expiry is not None:
+        entry.expiry.cancel()
+
+
+def suspend(
+    token: str,
+    state: SessionState,
+    finish: Callable[[SessionState], Awaitable],
+) -> None:
+    """Keep `state` resumable; `finish(state)` runs if nobody resumes in time."""
+    entry = _entries.get(token)
+    if entry is None:
+        return
+    entry.state = state
+    entry.finish = finish
+    entry.expiry = asyncio.get_running_loop().call_later(
+        settings.SESSION_RESUME_GRACE_S, _expire, token,
+    )
+    entry.suspended.set()
+
+
+async def claim(token: str, google_id: str) -> SessionState | None:
+    """Take over the session behind `token` (None if unknown, expired or not ours)."""
+    entry = _entries.get(token)
+    if entry is None or entry.google_id != google_id:
+        return None
+    if entry.state is None:
+        entry.on_takeover()
+        try:
+            await asyncio.wait_for(entry.suspended.wait(), _TAKEOVER_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            return None
+        if _entries.get(token) is not entry:
+            return None
+    del _entries[token]
+    entry.expiry.cancel()
+    _resumed.inc()
+    return entry.state
+
+
+def _expire(token: str) -> None:
+    entry = _entries.pop(token, None)
+    if entry is None or entry.state is None:
+        return
+    _expired.inc()
+    print(f"⌛ Session {entry.state.session_id[:8]}… not resumed — finishing it")
+    task = asyncio.create_task(_finish(entry), name=f"finish-{entry.state.session_id[:8]}")
+    _finishing.add(task)
+    task.add_done_callback(_finishing.discard)
+
+
+async def _finish(entry: _Entry) -> None:
+    try:
+        await entry.finish(entry.state)
+    except Exception as e:
+        print(f"❌ Finishing suspended session failed: {e}")
+
+
+async def finish_all() -> None:
+    """
+    Shutdown: finish every suspended session now instead of losing it, and
+    wait for the ones whose grace period already ran out to finish.
+    """
+    for token, entry in list(_entries.items()):
+        if entry.state is None:
+            continue
+        del _entries[token]
+        entry.expiry.cancel()
+        await _finish(entry)
+    if _finishing:
+        await asyncio.gather(*_finishing, return_exceptions=True)
@@ -0,0 +1,85 @@
+"""
+Shutdown Service
+----------------
+Drains the process on a rolling deploy so live sessions and post-session
+work are not lost.
+
+  1. drain_sessions() — runs before uvicorn stops serving (main.py).
+     /ws stops accepting sessions (close 1012, Service Restart), every live
+     session is told the server is restarting and ends the way a clean
+     close does: an in-flight reply is allowed to finish, the Tier 1 tail is
+     saved and its post-session job queued.
+  2. drain_pipelines() — lifespan shutdown. Sessions still waiting for a
+     resume are finished (and ones whose grace already ran out are waited
+     for), then the in-process job worker gets until the deadline. Jobs it
+     cannot finish are handed back to the durable queue (job_queue_service)
+     for the next worker.
+
+Both phases share one deadline, SHUTDOWN_DRAIN_TIMEOUT_S after the drain
+began — keep it below the platform's kill grace period.
+"""
+import asyncio
+import time
+from typing import Callable
+
+from app.core.config import settings
+
+_draining: bool = False
+_deadline: float | None = None                  # time.monotonic()
+_sessions: set[Callable[[], None]] = set()      # live /ws sessions' stop callbacks
+
+
+def draining() -> bool:
+    """True once shutdown began — /ws rejects new sessions."""
+    return _draining
+
+
+def time_left() -> float:
+    """Seconds until the drain deadline (infinite while not draining)."""
+    if _deadline is None:
+        return float("inf")
+    return max(0.0, _deadline - time.monotonic())
+
+
+# ── Live sessions ────────────────────────────────────────────────────────────
+
+def register_session(stop: Callable[[], None]) -> None:
+    """A /ws session started; `stop()` asks it to wind down."""
+    _sessions.add(stop)
+    if _draining:
+        stop()
+
+
+def unregister_session(stop: Callable[[], None]) -> None:
+    _sessions.discard(stop)
+
+
+# ── Drain ────────────────────────────────────────────────────────────────────
+
+async def drain_sessions() -> None:
+    """Stop accepting /ws and wind down every live session."""
+    global _draining, _deadline
+    if _draining:
+        return
+    _draining = True
+    _deadline = time.monotonic() + settings.SHUTDOWN_DRAIN_TIMEOUT_S
+    if _sessions:
+        print(f"🛑 Draining {len(_sessions)} live session(s)…")
+    for stop in list(_sessions):
+        stop()
+    while _sessions and time_left() > 0:
+        await asyncio.sleep(0.1)
+    if _sessions:
+        print(f"⚠️  {len(_sessions)} session(s) still open at the drain deadline")
+
+
+async def drain_pipelines(finish_suspended: Callable, job_worker=None) -> None:
+    """
+    Finish suspended sessions (queueing their pipelines), then give the
+    in-process job worker until the deadline; unfinished jobs go back to
+    the queue for the next worker.
+    """
+    await drain_sessions()  # no-op when main.py already drained
+    await finish_suspended()
+    if job_worker is not None:
+        await job_worker.stop(timeout=time_left())
@@ -2,11 +2,41 @@
 STT Service
 -----------
 Handles connecting to Deepgram Speech-to-Text WebSocket with retry + backoff.
+
+STTStream supervises one session's STT socket. It keeps the last
+STT_REPLAY_BUFFER_S of browser audio in a ring buffer; if Deepgram drops the
+socket mid-session it reconnects, re-sends the WebM header chunk and replays
+every buffered chunk Deepgram had not yet finalized, so the session (and its
+conversation history) survives an upstream drop. Results from the new
+socket are mapped back onto the session's audio clock via `clock_offset`.
+
+Stats: deepgram_reconnects_total{kind="stt"}, stt_reconnect_ms and
+stt_replayed_bytes.
 """
 import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable
+
 import websockets
 
 from app.core.config import settings
+from app.core.metrics import deepgram_reconnects, histogram
+
+# The browser's MediaRecorder timeslice (client useWebSocket.js, start(100)).
+# Chunk positions on Deepgram's audio clock are estimated from it.
+_CHUNK_S = 0.1
+
+_reconnects = deepgram_reconnects("stt")
+_reconnect_ms = histogram(
+    "stt_reconnect_ms",
+    "Time from an STT socket drop until buffered audio was replayed on the new one",
+)
+_replayed_bytes = histogram(
+    "stt_replayed_bytes",
+    "Audio bytes replayed to Deepgram after an STT reconnect",
+    buckets=(0, 1e3, 5e3, 1e4, 2.5e4, 5e4, 1e5, 2.5e5),
+)
 
 
 async def connect_stt() -> websockets.WebSocketClientProtocol:
@@ -31,3 +61,159 @@ async def connect_stt() -> websockets.WebSocketClientProtocol:
                 await asyncio.sleep(wait)
 
     raise RuntimeError(f"STT connection failed after 3 attempts: {last_error}")
+
+
+class STTStream:
+    """
+    Supervised Deepgram STT socket for one /ws session.
+
+    Audio goes in through send(), results come out of results(); a dropped
+    socket is replaced transparently by `connect` (the warm pool in ws.py).
+    The consumer reports how far Deepgram has finalized the audio with
+    finalize(), which decides what is replayed after a drop.
+    """
+
+    def __init__(self, ws, connect: Callable[[], Awaitable]) -> None:
+        self.ws = ws
+        self._connect = connect
+        self._header: bytes | None = None               # first chunk: WebM EBML header
+        self._ring: deque[tuple[int, bytes]] = deque(
+            maxlen=max(1, round(settings.STT_REPLAY_BUFFER_S / _CHUNK_S))
+        )                                               # (seq, chunk)
+        self._seq = 0                                   # chunks received this session
+        self._reconnect: asyncio.Task | None = None
+        self._closing = False
+        self.finalized_until = 0.0                      # session audio seconds
+        self.clock_offset = 0.0                         # current socket → session clock
+        self.generation = 0                             # bumped on every reconnect
+        self.reconnects = 0
+
+    async def __aenter__(self) -> "STTStream":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    # ── Audio in ──────────────────────────────────────────────────────────────
+
+    async def send(self, chunk: bytes) -> None:
+        """Forward one browser chunk; buffered for replay if the socket drops."""
+        self._seq += 1
+        if self._header is None:
+            self._header = chunk
+        self._ring.append((self._seq, chunk))
+        if self._reconnect is not None:
+            return  # sent by the replay once the new socket is up
+        ws = self.ws
+        try:
+            await ws.send(chunk)
+        except websockets.exceptions.ConnectionClosed:
+            if ws is self.ws:
+                self._start_reconnect()
+
+    async def send_control(self, message: str) -> None:
+        """Control message (KeepAlive) — skipped while reconnecting."""
+        if self._reconnect is not None or self._closing:
+            return
+        ws = self.ws
+        try:
+            await ws.send(message)
+        except websockets.exceptions.ConnectionClosed:
+            if ws is self.ws:
+                self._start_reconnect()
+
+    def finalize(self, until_s: float) -> None:
+        """Deepgram finalized the session's audio up to `until_s` seconds."""
+        self.finalized_until = max(self.finalized_until, until_s)
+
+    # ── Results out ───────────────────────────────────────────────────────────
+
+    async def results(self) -> AsyncIterator[str]:
+        """Raw Deepgram messages across reconnects; ends when STT is gone for good."""
+        while True:
+            ws = self.ws
+            try:
+                async for raw in ws:
+                    yield raw
+            except websockets.exceptions.ConnectionClosed:
+                pass
+            if self._closing:
+                return
+            if ws is self.ws and not await self._start_reconnect():
+                return
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+        try:
+            await self.ws.close()
+        except Exception:
+            pass
+
+    # ── Failover ──────────────────────────────────────────────────────────────
+
+    def _start_reconnect(self) -> asyncio.Task:
+        if self._reconnect is None:
+            self._reconnect = asyncio.create_task(self._reconnect_and_replay(), name="stt-reconnect")
+        return self._reconnect
+
+    async def _reconnect_and_replay(self) -> bool:
+        try:
+            if self._closing:
+                return False
+            if self.reconnects >= settings.STT_MAX_RECONNECTS:
+                print(f"❌ STT dropped again after {self.reconnects} reconnects — giving up")
+                return False
+            self.reconnects += 1
+            _reconnects.inc()
+            dropped_at = time.perf_counter()
+            print("⚠️ STT socket dropped — reconnecting")
+            try:
+                self.ws = await self._connect()
+            except Exception as e:
+                print(f"❌ STT reconnect failed: {e}")
+                return False
+
+            # Replay from the chunk holding the first un-finalized audio
+            first = int(self.finalized_until / _CHUNK_S) + 1
+            oldest = self._ring[0][0] if self._ring else self._seq + 1
+            lost = max(0, oldest - first)
+            first = min(max(first, oldest), self._seq + 1)
+            replayed = 0
+            try:
+                if first > 1 and self._header is not None:
+                    # A new stream must start with the WebM header; it occupies
+                    # one chunk of the new clock ahead of the replayed audio.
+                    await self.ws.send(self._header)
+                    replayed += len(self._header)
+                    self.clock_offset = (first - 2) * _CHUNK_S
+                else:
+                    self.clock_offset = 0.0
+                seq = first
+                # Chunks keep arriving while we replay; catch up to the live edge
+                while seq <= self._seq:
+                    index = seq - self._ring[0][0]
+                    if index < 0:
+                        lost += -index
+                        seq = self._ring[0][0]
+                        continue
+                    chunk = self._ring[index][1]
+                    await self.ws.send(chunk)
+                    replayed += len(chunk)
+                    seq += 1
+            except websockets.exceptions.ConnectionClosed:
+                print("❌ STT socket closed during replay")
+                return False
+
+            self.generation += 1
+            elapsed_ms = (time.perf_counter() - dropped_at) * 1000
+            _reconnect_ms.observe(elapsed_ms)
+            _replayed_bytes.observe(replayed)
+            print(
+                f"🔁 STT reconnected in {elapsed_ms:.0f} ms — replayed {replayed:,} bytes"
+                + (f" ({lost} chunks lost)" if lost else "")
+            )
+            return True
+        finally:
+            self._reconnect = None
@@ -0,0 +1,158 @@
+"""
+Tier 1 Persister Service
+------------------------
+Write-behind persistence of a session's transcript while it is running.
+
+Previously Tier 1 was written once, as one upsert of the whole history on
+the disconnect path, so a crash or redeploy lost the entire session. A
+Tier1Persister watches the session's append-only `current_session_history`
+and `$push`es the turns not yet stored:
+
+  - every TIER1_FLUSH_TURNS new messages (checked after each turn), or
+  - every TIER1_FLUSH_INTERVAL_S on the shared heartbeat wheel,
+
+so the final flush at disconnect only writes the tail.
+
+Bounded: at most one write is in flight per session (triggers that fire
+meanwhile coalesce into the next one) and each write carries at most
+TIER1_MAX_BATCH_TURNS messages. While MongoDB is unreachable the unsaved
+tail stays in RAM — it is the live conversation — and is visible in the
+tier1_unsaved_messages gauge, which counts running persisters only: a
+stopped one (session ended or suspended) gives its share back.
+
+Every append is guarded by the stored message count, so a retried write
+never duplicates turns; if the document is found out of step the whole
+history is rewritten once (tier1_resyncs_total).
+"""
+import asyncio
+import time
+from datetime import datetime
+
+from app.core.config import settings
+from app.core.metrics import counter, gauge, histogram
+from app.services.heartbeat_service import Heartbeat, heartbeat
+from app.services.memory_mongo_service import append_session_turns, save_session_history
+
+_total_unsaved: int = 0
+
+gauge(
+    "tier1_unsaved_messages",
+    "Transcript messages held in RAM that are not yet in MongoDB",
+    fn=lambda: _total_unsaved,
+)
+_flush_ms = histogram(
+    "tier1_flush_ms",
+    "Duration of one incremental Tier 1 write",
+)
+_resyncs = counter(
+    "tier1_resyncs_total",
+    "Incremental Tier 1 writes that found the stored transcript out of step",
+)
+
+
+def _flushes(trigger: str):
+    return counter(
+        "tier1_flushes_total",
+        "Incremental Tier 1 writes by trigger (turns, interval, final)",
+        trigger=trigger,
+    )
+
+
+class Tier1Persister:
+    """Write-behind writer for one session's Tier 1 transcript."""
+
+    def __init__(
+        self,
+        google_id: str,
+        session_id: str,
+        started_at: datetime,
+        history: list,
+    ) -> None:
+        self.google_id = google_id
+        self.session_id = session_id
+        self.started_at = started_at
+        self.history = history
+        self.saved = 0                   # messages of `history` stored in MongoDB
+        self._counted = 0                # unsaved messages counted in the gauge
+        self._lock = asyncio.Lock()
+        self._inflight: asyncio.Task | None = None
+        self._beat: Heartbeat | None = None
+
+    @property
+    def unsaved(self) -> int:
+        return len(self.history) - self.saved
+
+    def start(self) -> None:
+        """Begin periodic flushing (again, for a resumed session)."""
+        if self._beat is None:
+            self._beat = heartbeat.register(
+                self._tick,
+                settings.TIER1_FLUSH_INTERVAL_S,
+                name=f"tier1-{self.session_id[:8]}",
+            )
+
+    def stop(self) -> None:
+        if self._beat is not None:
+            self._beat.cancel()
+            self._beat = None
+        self._account()
+
+    def notify(self) -> None:
+        """A turn was appended; flush in the background once enough piled up."""
+        self._account()
+        if self.unsaved >= settings.TIER1_FLUSH_TURNS:
+            self._kick("turns")
+
+    async def flush(self) -> bool:
+        """Write the whole unsaved tail now (disconnect / shutdown). True if stored."""
+        if self._inflight is not None:
+            await asyncio.gather(self._inflight, return_exceptions=True)
+        ok = await self._write("final")
+        self._account()
+        return ok
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    async def _tick(self) -> bool:
+        self._account()
+        if self.unsaved:
+            self._kick("interval")
+        return True
+
+    def _kick(self, trigger: str) -> None:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(
+                self._write(trigger), name=f"tier1-{self.session_id[:8]}",
+            )
+
+    async def _write(self, trigger: str) -> bool:
+        async with self._lock:
+            try:
+                while self.unsaved:
+                    end = min(len(self.history), self.saved + settings.TIER1_MAX_BATCH_TURNS)
+                    batch = self.history[self.saved:end]
+                    started = time.perf_counter()
+                    appended = await append_session_turns(
+                        self.google_id, self.session_id, self.started_at, batch, self.saved,
+                    )
+                    if not appended:
+                        _resyncs.inc()
+                        end = len(self.history)
+                        await save_session_history(
+                            self.google_id, self.session_id, self.started_at, self.history[:end],
+                        )
+                    _flush_ms.observe((time.perf_counter() - started) * 1000)
+                    _flushes(trigger).inc()
+                    self.saved = end
+                return True
+            except Exception as e:
+                print(f"⚠️  Tier 1 write failed ({self.unsaved} messages pending): {e}")
+                return False
+            finally:
+                self._account()
+
+    def _account(self) -> None:
+        global _total_unsaved
+        unsaved = self.unsaved if self._beat is not None else 0
+        _total_unsaved += unsaved - self._counted
+        self._counted = unsaved
@@ -6,13 +6,48 @@ Wraps Deepgram Text-to-Speech WebSocket.
 Responsibilities:
   - connect_tts: opens and returns a Deepgram TTS WebSocket with retry + backoff.
   - TTSSession: per-connection lock/task state so concurrent users never interleave audio.
+    Owns one long-lived reader task per TTS socket that routes every frame to
+    the oldest sentence still awaiting `Flushed` (Deepgram answers flushes in
+    the order they were sent).
+    Also owns the socket's health: a dead socket is replaced by one shared
+    reconnect that every later sentence waits on, with exponential backoff
+    between failing attempts and a circuit breaker that stops reconnecting
+    for TTS_CIRCUIT_COOLDOWN_S after TTS_CIRCUIT_FAILURES in a row (a socket
+    that dies within _STABLE_S of connecting counts as a failure too).
+  - TTSPipeline: keeps several Speak…Flush segments in flight on one socket so
+    Deepgram synthesises sentence N+1 while sentence N is being forwarded.
+    Text may be streamed in token by token; Flush marks segment boundaries.
   - send_buffer_to_tts: streams synthesised PCM audio back to the frontend WebSocket.
 """
 import asyncio
 import json
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
 import websockets
 
 from app.core.config import settings
+from app.core.metrics import counter, deepgram_reconnects, histogram
+from app.core.turn_trace import TurnTrace
+
+
+# linear16 @ 24 kHz mono (DEEPGRAM_TTS_URL) — used to estimate playback time
+_PCM_BYTES_PER_S = 24000 * 2
+
+# A replaced socket that lived less than this was flapping, not healthy
+_STABLE_S = 10
+
+_reconnects = deepgram_reconnects("tts")
+_session_reconnects = histogram(
+    "tts_session_reconnects",
+    "TTS socket reconnects used by one /ws session",
+    buckets=(0, 1, 2, 3, 5, 10),
+)
+_circuit_opens = counter(
+    "tts_circuit_open_total",
+    "Times a session's TTS circuit breaker opened after repeated reconnect failures",
+)
 
 
 async def connect_tts() -> websockets.WebSocketClientProtocol:
@@ -39,106 +74,479 @@ async def connect_tts() -> websockets.WebSocketClientProtocol:
     raise RuntimeError(f"TTS connection failed after 3 attempts: {last_error}")
 
 
+class _Utterance:
+    """A single Speak…Flush segment on the TTS socket."""
+
+    def __init__(self, tts_ws, generation: int) -> None:
+        self.text = ""
+        self.ws = tts_ws               # socket the segment was opened on
+        self.generation = generation   # TTSSession generation it belongs to
+        self.failed = False            # socket died — stop sending, retry later
+        self.flushed = asyncio.Event() # Flush sent; text is final
+        # PCM bytes as they arrive; None once Deepgram reports `Flushed`,
+        # or the exception that closed the socket underneath the sentence.
+        self.frames: asyncio.Queue = asyncio.Queue()
+
+    def fail(self, error: Exception) -> None:
+        self.failed = True
+        self.frames.put_nowait(error)
+
+
 class TTSSession:
-    """Holds per-WebSocket-connection TTS state. Create one per /ws connection."""
+    """
+    Holds per-WebSocket-connection TTS state. Create one per /ws connection.
+
+    `connect` opens a replacement socket (ws.py passes the warm pool's
+    acquire_tts); the session connects on demand whenever it has no live
+    socket, so callers never handle the socket themselves.
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, connect: Callable[[], Awaitable] = connect_tts) -> None:
         self.lock: asyncio.Lock = asyncio.Lock()
         self.current_task: asyncio.Task | None = None
+        self.ws = None
+        self._connect = connect
+        self._reader_task: asyncio.Task | None = None
+        # Connection health — see reconnect()
+        self._connecting: asyncio.Task | None = None
+        self._attached_at: float = 0.0
+        self._failures = 0                 # consecutive failed / flapping reconnects
+        self._circuit_open_until: float = 0.0
+        self.reconnects = 0                # reconnects this session
+        # Utterances awaiting `Flushed`, in the order their Flush was sent
+        self._pending: deque[_Utterance] = deque()
+        # Held from open() to flush() so a segment's Speak messages and its
+        # Flush are never interleaved with another segment's on the wire.
+        # Only the task that opened the segment releases it (flush/abandon).
+        self._send_lock: asyncio.Lock = asyncio.Lock()
+        self._open: _Utterance | None = None
+        # Bumped by clear(); sends for segments of an older generation are
+        # dropped, so a cleared segment's holder just runs out and releases.
+        self._generation = 0
+        # Cleared while a `Clear` is outstanding — frames still arriving from
+        # interrupted sentences are dropped until Deepgram sends `Cleared`.
+        self._cleared: asyncio.Event = asyncio.Event()
+        self._cleared.set()
+        # Estimated time.monotonic() at which the client finishes playing the
+        # audio forwarded so far — Lila is still audible until then.
+        self.playback_until: float = 0.0
 
+    @property
+    def audible(self) -> bool:
+        return time.monotonic() < self.playback_until
 
-async def send_buffer_to_tts(text: str, websocket, tts_ws, session: TTSSession) -> None:
-    """
-    Send a text sentence to Deepgram TTS and stream raw PCM audio back
-    to the frontend WebSocket in real-time.
+    def extend_playback(self, nbytes: int) -> None:
+        """Account for `nbytes` of PCM forwarded to the client."""
+        now = time.monotonic()
+        self.playback_until = max(self.playback_until, now) + nbytes / _PCM_BYTES_PER_S
 
-    Protocol (replaces the old single-blob approach):
-      1. JSON  {"type": "tts_start", "response": "<text>"}
-             → frontend queues the caption and resets its chunk accumulator.
-      2. Binary frames  <PCM chunk> ...
-             → forwarded to the frontend the instant Deepgram generates them.
-             → frontend accumulates these in memory (negligible cost).
-      3. JSON  {"type": "tts_end"}
-             → frontend assembles the accumulated PCM into a WAV blob,
-               pushes it to the audio queue, and starts playback.
+    @property
+    def connected(self) -> bool:
+        return self.ws is not None and self._reader_task is not None and not self._reader_task.done()
 
-    Why this is faster than the old approach:
-      Old: buffer ALL audio on the server (1-3 s per sentence), send one blob.
-      New: first chunk arrives from Deepgram in ~150 ms and is forwarded
-           immediately. Total transfer time ≈ TTS generation time, but the
-           browser starts receiving data ~150 ms sooner per sentence.
+    def attach(self, tts_ws) -> None:
+        """Adopt `tts_ws` and start its reader task (replacing any old one)."""
+        if self._reader_task and not self._reader_task.done():
+            self._reader_task.cancel()
+        self._fail_pending(ConnectionError("TTS socket replaced"))
+        self.ws = tts_ws
+        self._attached_at = time.monotonic()
+        self._cleared.set()
+        self._reader_task = asyncio.create_task(
+            self._read_loop(tts_ws), name="tts-reader",
+        )
 
-    Uses a per-session lock to serialise requests so concurrent users
-    never interleave audio on the same TTS WebSocket.
+    async def detach(self):
+        """Stop the reader and hand back the TTS socket (None if there is none)."""
+        if self._connecting is not None:
+            self._connecting.cancel()
+        if self._reader_task and not self._reader_task.done():
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+        self._reader_task = None
+        self._fail_pending(ConnectionError("TTS socket released"))
+        tts_ws, self.ws = self.ws, None
+        return tts_ws
+
+    def prepare(self) -> None:
+        """Start connecting in the background (e.g. on resume from parking)."""
+        if not self.connected and self._connecting is None:
+            self._start_connect(None).add_done_callback(
+                lambda task: task.cancelled() or task.exception()
+            )
+
+    async def reconnect(self, failed_ws) -> None:
+        """
+        Replace `failed_ws` (None: no socket yet) with a fresh connection.
+
+        Every caller that saw the same socket die shares one attempt; if the
+        socket was already replaced this returns at once. Raises if the
+        attempt fails or the circuit breaker is open.
+        """
+        if self.ws is not failed_ws and self.connected:
+            return
+        await asyncio.shield(self._start_connect(failed_ws))
+
+    def _start_connect(self, failed_ws) -> asyncio.Task:
+        if self._connecting is None:
+            self._connecting = asyncio.create_task(self._replace(failed_ws), name="tts-connect")
+        return self._connecting
+
+    async def _replace(self, failed_ws) -> None:
+        try:
+            now = time.monotonic()
+            if failed_ws is not None and now >= self._circuit_open_until:
+                if now - self._attached_at < _STABLE_S:
+                    self._record_failure()
+                else:
+                    self._failures = 0
+            if now < self._circuit_open_until:
+                raise ConnectionError(
+                    f"TTS circuit open for another {self._circuit_open_until - now:.0f}s"
+                )
+            if failed_ws is not None:
+                self.reconnects += 1
+                _reconnects.inc()
+            if self._failures:
+                await asyncio.sleep(min(
+                    settings.TTS_RECONNECT_BACKOFF_MAX_S,
+                    settings.TTS_RECONNECT_BACKOFF_S * 2 ** (self._failures - 1),
+                ))
+            try:
+                tts_ws = await self._connect()
+            except Exception:
+                self._record_failure()
+                raise
+            self.attach(tts_ws)
+            if failed_ws is not None:
+                print(f"🔄 TTS WebSocket reconnected (reconnect #{self.reconnects} this session)")
+                try:
+                    await failed_ws.close()
+                except Exception:
+                    pass
+        finally:
+            self._connecting = None
+
+    def _record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= settings.TTS_CIRCUIT_FAILURES:
+            self._circuit_open_until = time.monotonic() + settings.TTS_CIRCUIT_COOLDOWN_S
+            self._failures = 0
+            _circuit_opens.inc()
+            print(f"🔌 TTS circuit open — no reconnects for {settings.TTS_CIRCUIT_COOLDOWN_S:.0f}s")
+
+    async def close(self) -> None:
+        """Stop the reader and close the TTS socket."""
+        _session_reconnects.observe(self.reconnects)
+        if self._connecting is not None:
+            self._connecting.cancel()
+        if self._reader_task and not self._reader_task.done():
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+        if self.ws:
+            try:
+                await self.ws.close()
+            except Exception:
+                pass
+
+    def _fail_pending(self, error: Exception) -> None:
+        while self._pending:
+            self._pending.popleft().fail(error)
+
+    async def _read_loop(self, tts_ws) -> None:
+        """Route every frame from Deepgram to the oldest unflushed sentence."""
+        try:
+            async for message in tts_ws:
+                if isinstance(message, bytes):
+                    if self._pending and self._cleared.is_set():
+                        self._pending[0].frames.put_nowait(message)
+                    continue
+
+                msg = json.loads(message)
+                msg_type = msg.get("type")
+                if msg_type == "Flushed":
+                    if self._pending and self._cleared.is_set():
+                        self._pending.popleft().frames.put_nowait(None)
+                elif msg_type == "Cleared":
+                    self._cleared.set()
+                elif msg_type in ("Warning", "Error"):
+                    print(f"⚠️ TTS {msg_type.lower()}: {msg}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            closed: Exception = e
+        else:
+            closed = ConnectionError("TTS socket closed by Deepgram")
+
+        # Wake waiting sentences so they can reconnect instead of hanging
+        if self.ws is tts_ws:
+            self._fail_pending(closed)
+            self._cleared.set()
+
+    async def _send(self, utterance: _Utterance, message: dict) -> None:
+        if (
+            utterance.failed
+            or utterance.ws is not self.ws
+            or utterance.generation != self._generation
+        ):
+            return
+        try:
+            await self.ws.send(json.dumps(message))
+        except (websockets.exceptions.ConnectionClosed, OSError) as e:
+            if utterance in self._pending:
+                self._pending.remove(utterance)
+            utterance.fail(e)
+
+    async def open(self) -> _Utterance:
+        """Start a new segment; text is added with speak() and closed by flush()."""
+        await self._cleared.wait()
+        error: Exception | None = None
+        if not self.connected:
+            try:
+                await self.reconnect(self.ws)
+            except Exception as e:
+                error = e
+        await self._send_lock.acquire()
+        utterance = _Utterance(self.ws, self._generation)
+        self._open = utterance
+        if not self.connected:
+            utterance.fail(error or ConnectionError("TTS socket is no longer being read"))
+        else:
+            self._pending.append(utterance)
+        return utterance
+
+    async def speak(self, utterance: _Utterance, text: str) -> None:
+        """Append `text` to an open segment — Deepgram buffers it until Flush."""
+        if not text:
+            return  # e.g. the end-of-stream marker — the Flush alone ends it
+        utterance.text += text
+        await self._send(utterance, {"type": "Speak", "text": text})
+
+    async def flush(self, utterance: _Utterance) -> None:
+        """Close the segment and ask Deepgram to synthesise it."""
+        try:
+            await self._send(utterance, {"type": "Flush"})
+        finally:
+            self.abandon(utterance)
+
+    def abandon(self, utterance: _Utterance) -> None:
+        """The opener is done with `utterance` (flushed or given up) — release it."""
+        utterance.flushed.set()
+        if self._open is utterance:
+            self._open = None
+            self._send_lock.release()
+
+    async def begin(self, text: str) -> _Utterance:
+        """Send Speak+Flush for `text`; its frames arrive on the returned utterance."""
+        utterance = await self.open()
+        try:
+            await self.speak(utterance, text)
+        finally:
+            await self.flush(utterance)
+        return utterance
+
+    async def clear(self) -> None:
+        """
+        Abandon every sentence in flight and ask Deepgram to drop its audio.
+        A segment still open elsewhere is invalidated, not released: its
+        remaining sends become no-ops and its own task releases it.
+        """
+        self._generation += 1
+        self._pending.clear()
+        if self._open is not None:
+            self._open.flushed.set()
+        self._cleared.clear()
+        try:
+            await self.ws.send(json.dumps({"type": "Clear"}))
+        except Exception:
+            self._cleared.set()
+
+
+class TTSPipeline:
     """
-    print(f"\n🎤 TTS ← '{text}'")
+    Per-turn pipelined synthesis on the session's single TTS socket.
 
-    async with session.lock:
-        for attempt in range(2):
+    Text is streamed in with speak() — a single LLM token or a whole
+    sentence — and flush() marks a segment boundary. Up to `depth` segments
+    may be in flight ahead of the one being forwarded, and a forwarder task
+    streams each segment's audio to the client strictly in flush order.
+    With depth=1 this is the classic one-sentence-at-a-time behaviour.
+
+    Use as an async context manager for the duration of one turn: it holds
+    the session lock, drains on normal exit and sends `Clear` on barge-in.
+    """
+
+    def __init__(
+        self,
+        websocket,
+        session: TTSSession,
+        depth: int = 1,
+        trace: TurnTrace | None = None,
+    ) -> None:
+        self.websocket = websocket
+        self.session = session
+        self.trace = trace
+        self.completed: int = 0        # segments fully forwarded to the client
+        self._slots = asyncio.Semaphore(max(1, depth))
+        self._order: asyncio.Queue = asyncio.Queue()
+        self._open: _Utterance | None = None
+        self._forwarder: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "TTSPipeline":
+        await self.session.lock.acquire()
+        self.session.current_task = asyncio.current_task()
+        self._forwarder = asyncio.create_task(self._forward_loop(), name="tts-forwarder")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                await self.drain()
+            else:
+                self._forwarder.cancel()
+                await asyncio.gather(self._forwarder, return_exceptions=True)
+                if exc_type is asyncio.CancelledError:
+                    print("🛑 TTS cancelled (user interrupted)")
+                # Release the segment this task still holds open
+                if self._open is not None:
+                    utterance, self._open = self._open, None
+                    self.session.abandon(utterance)
+                # Do NOT send tts_end — frontend discards accumulated chunks
+                # on the next tts_start anyway.
+                await self.session.clear()
+        finally:
+            if self.session.current_task == asyncio.current_task():
+                self.session.current_task = None
+            self.session.lock.release()
+
+    async def speak(self, text: str) -> None:
+        """Stream `text` into the current segment, opening one if needed."""
+        if self._open is None:
+            if not text.strip():
+                return  # never open a segment on bare whitespace
+            await self._slots.acquire()
+            self._open = await self.session.open()
+            self._order.put_nowait(self._open)
+        await self.session.speak(self._open, text)
+
+    async def flush(self) -> bool:
+        """End the current segment. Returns False if there was nothing to flush."""
+        utterance, self._open = self._open, None
+        if utterance is None:
+            return False
+        print(f"\n🎤 TTS ← '{utterance.text.strip()}'")
+        await self.session.flush(utterance)
+        return True
+
+    async def submit(self, text: str) -> None:
+        """Queue a whole sentence for synthesis."""
+        await self.speak(text)
+        await self.flush()
+
+    async def drain(self) -> None:
+        """Wait until every submitted segment has been forwarded."""
+        await self.flush()
+        self._order.put_nowait(None)
+        await self._forwarder
+
+    async def _forward_loop(self) -> None:
+        while True:
+            utterance = await self._order.get()
+            if utterance is None:
+                return
             try:
-                session.current_task = asyncio.current_task()
+                await self._forward(utterance)
+            finally:
+                self._slots.release()
 
+    async def _forward(self, utterance: _Utterance) -> None:
+        websocket = self.websocket
+        # The caption needs the segment's final text
+        await utterance.flushed.wait()
+        for attempt in range(2):
+            try:
                 # Signal sentence start — frontend queues caption & resets buffer
-                await websocket.send_text(json.dumps({"type": "tts_start", "response": text}))
-
-                await tts_ws.send(json.dumps({"type": "Speak", "text": text}))
-                await tts_ws.send(json.dumps({"type": "Flush"}))
+                await websocket.send_text(
+                    json.dumps({"type": "tts_start", "response": utterance.text.strip()})
+                )
 
                 any_audio = False
-                timeout_count = 0
-                max_timeouts = 5  # 5 × 0.3 s = 1.5 s total silence before giving up
-
-                while timeout_count < max_timeouts:
-                    try:
-                        chunk = await asyncio.wait_for(tts_ws.recv(), timeout=0.3)
-                        timeout_count = 0
-                        if isinstance(chunk, bytes):
-                            any_audio = True
-                            # Stream directly — no server-side buffering
-                            await websocket.send_bytes(chunk)
-                        elif isinstance(chunk, str):
-                            msg = json.loads(chunk)
-                            if msg.get("type") == "Flushed":
-                                print(f"✅ TTS sentence done (streamed)")
-                                break
-                    except asyncio.TimeoutError:
-                        timeout_count += 1
-                        if any_audio and timeout_count >= 2:
-                            break  # have audio and silence — done
+                while True:
+                    frame = await utterance.frames.get()
+                    if frame is None:
+                        print(f"✅ TTS sentence done (streamed)")
+                        break
+                    if isinstance(frame, Exception):
+                        raise frame
+                    any_audio = True
+                    if self.trace:
+                        self.trace.mark("first_tts_byte")
+                    # Stream directly — no server-side buffering
+                    await websocket.send_bytes(frame)
+                    self.session.extend_playback(len(frame))
+                    if self.trace:
+                        self.trace.mark("first_client_byte")
 
                 if not any_audio:
                     print("⚠️ No audio received from TTS")
 
                 # Signal sentence end — frontend assembles accumulated chunks into WAV
                 await websocket.send_text(json.dumps({"type": "tts_end"}))
-                break  # Success, exit retry loop
-
-            except asyncio.CancelledError:
-                print("🛑 TTS cancelled (user interrupted)")
-                try:
-                    await tts_ws.send(json.dumps({"type": "Clear"}))
-                except Exception:
-                    pass
-                # Do NOT send tts_end — frontend discards accumulated chunks
-                # on the next tts_start anyway.
-                raise
+                self.completed += 1
+                return
 
             except (websockets.exceptions.ConnectionClosed, OSError) as e:
                 print(f"❌ TTS connection closed: {e}")
                 if attempt == 0:
                     try:
-                        tts_ws = await connect_tts()
-                        print("🔄 TTS WebSocket reconnected, retrying...")
+                        # Later sentences sent on the same dead socket share
+                        # this reconnect rather than opening one each.
+                        await self.session.reconnect(utterance.ws)
+                        utterance = await self.session.begin(utterance.text)
                         continue
                     except Exception as conn_err:
                         print(f"❌ TTS reconnection failed: {conn_err}")
                 print("⚠️ TTS reconnection failed or already retried, giving up.")
-                break
+                return
 
             except Exception as e:
                 print(f"❌ TTS error: {e}")
-                break
+                return
 
-            finally:
-                if session.current_task == asyncio.current_task():
-                    session.current_task = None
+
+async def send_buffer_to_tts(text: str, websocket, session: TTSSession) -> None:
+    """
+    Send a text sentence to Deepgram TTS and stream raw PCM audio back
+    to the frontend WebSocket in real-time.
+
+    Protocol (replaces the old single-blob approach):
+      1. JSON  {"type": "tts_start", "response": "<text>"}
+             → frontend queues the caption and resets its chunk accumulator.
+      2. Binary frames  <PCM chunk> ...
+             → forwarded to the frontend the instant Deepgram generates them.
+             → frontend accumulates these in memory (negligible cost).
+      3. JSON  {"type": "tts_end"}
+             → frontend assembles the accumulated PCM into a WAV blob,
+               pushes it to the audio queue, and starts playback.
+
+    Why this is faster than the old approach:
+      Old: buffer ALL audio on the server (1-3 s per sentence), send one blob.
+      New: first chunk arrives from Deepgram in ~150 ms and is forwarded
+           immediately. Total transfer time ≈ TTS generation time, but the
+           browser starts receiving data ~150 ms sooner per sentence.
+
+    Sentence completion is driven by Deepgram's `Flushed` event, delivered by
+    the session's reader task — there is no timeout-based end detection.
+
+    Uses a per-session lock to serialise requests so concurrent users
+    never interleave audio on the same TTS WebSocket. Multi-sentence turns
+    should use TTSPipeline directly to keep several sentences in flight.
+    """
+    async with TTSPipeline(websocket, session) as pipeline:
+        await pipeline.submit(text)
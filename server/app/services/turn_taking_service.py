@@ -0,0 +1,300 @@
+"""
+Turn-Taking Service
+-------------------
+Decides when the user has finished speaking — the utterance gate in ws.py.
+
+completion_probability() scores the accumulated transcript with a small
+logistic model over its last tokens: turns scoring at least
+TURN_COMPLETE_THRESHOLD fire the LLM at once, the rest wait for the user's
+silent window.
+
+PauseProfile learns how long a user pauses mid-turn. Every time the user
+resumes speaking after a `speech_final`, the silence between the last word
+of the previous segment and the first word of the next one (Deepgram word
+timestamps) is added to a compact fixed-bin histogram. The gate's silent
+window is then a percentile of that distribution instead of a fixed 1.2 s:
+fast speakers stop paying for pauses they never take, and slow, hesitant
+learners are no longer cut off.
+
+Pauses the window cut short are never seen in full — the LLM fired first.
+When the user resumes right after such a fire (or talks over the reply it
+started), the pause is recorded as censored: "at least the window". The
+percentile is a Kaplan–Meier estimate over both kinds of sample, and when
+it lies beyond every pause seen so far the window reaches past the longest
+cut-off, so a user who keeps getting cut off gets a longer window.
+
+The histogram is persisted on the user document (`users.pause_profile`) so
+the next session starts already calibrated.
+"""
+from __future__ import annotations
+
+import math
+import re
+
+from app.core.config import settings
+
+# Window used until a user has produced enough pauses to calibrate
+DEFAULT_WINDOW_MS: int = 1200
+
+_BIN_MS = 50                 # histogram resolution
+_MAX_PAUSE_MS = 3000         # longer gaps are new turns, not hesitation
+_MIN_SAMPLES = 8             # pauses needed before the learned window is used
+_DECAY_AT = 400              # halve all bins once this many samples accrue
+_GROW_MS = 250               # reach past the longest cut-off pause by this much
+
+
+class PauseProfile:
+    """
+    Histogram of a user's mid-turn pause lengths (ms).
+
+    `bins` counts pauses seen in full; `censored` counts pauses the window
+    cut off, in the bin of the window they were known to outlast.
+    """
+
+    def __init__(
+        self,
+        bins: list[int] | None = None,
+        censored: list[int] | None = None,
+    ) -> None:
+        self.bins: list[int] = self._sized(bins)
+        self.censored: list[int] = self._sized(censored)
+
+    @staticmethod
+    def _sized(counts: list[int] | None) -> list[int]:
+        size = _MAX_PAUSE_MS // _BIN_MS
+        counts = [int(count) for count in (counts or [])][:size]
+        return counts + [0] * (size - len(counts))
+
+    @classmethod
+    def from_doc(cls, doc: dict | None) -> "PauseProfile":
+        if not doc or doc.get("bin_ms") != _BIN_MS:
+            return cls()
+        return cls(doc.get("bins"), doc.get("censored"))
+
+    def to_doc(self) -> dict:
+        return {"bin_ms": _BIN_MS, "bins": self.bins, "censored": self.censored}
+
+    @property
+    def samples(self) -> int:
+        return sum(self.bins) + sum(self.censored)
+
+    def observe(self, pause_ms: float) -> None:
+        """Record one mid-turn pause; out-of-range gaps are ignored."""
+        if pause_ms < 0 or pause_ms >= _MAX_PAUSE_MS:
+            return
+        self.bins[int(pause_ms // _BIN_MS)] += 1
+        self._decay()
+
+    def observe_censored(self, at_least_ms: float) -> None:
+        """Record a pause the window cut off after `at_least_ms` of silence."""
+        if at_least_ms < 0:
+            return
+        index = min(int(at_least_ms // _BIN_MS), len(self.censored) - 1)
+        self.censored[index] += 1
+        self._decay()
+
+    def _decay(self) -> None:
+        # Exponential forgetting keeps the profile tracking the user's
+        # current pace as their fluency improves.
+        if self.samples >= _DECAY_AT:
+            self.bins = [count // 2 for count in self.bins]
+            self.censored = [count // 2 for count in self.censored]
+
+    def window_ms(self) -> int:
+        """Silent window for open-ended segments, from the learned percentile."""
+        total = self.samples
+        if total < _MIN_SAMPLES:
+            return DEFAULT_WINDOW_MS
+        # Kaplan–Meier: a pause censored in bin i was still going on there,
+        # so it stays at risk through bin i and leaves the risk set after.
+        quantile = settings.UTTERANCE_WINDOW_PERCENTILE
+        at_risk, survival = total, 1.0
+        window: int | None = None
+        for index, (ended, cut_off) in enumerate(zip(self.bins, self.censored)):
+            if ended and at_risk:
+                survival *= 1 - ended / at_risk
+                if 1 - survival >= quantile:
+                    window = (index + 1) * _BIN_MS
+                    break
+            at_risk -= ended + cut_off
+        if window is None:
+            # The percentile lies beyond every pause seen in full — reach
+            # past the longest one the window cut off.
+            longest = max(
+                (index for index, count in enumerate(self.censored) if count),
+                default=None,
+            )
+            if longest is None:
+                window = _MAX_PAUSE_MS
+            else:
+                window = (longest + 1) * _BIN_MS + _GROW_MS
+        return max(
+            settings.UTTERANCE_WINDOW_MIN_MS,
+            min(settings.UTTERANCE_WINDOW_MAX_MS, window),
+        )
+
+
+# ── Turn-completion classifier ───────────────────────────────────────────────
+#
+# Logistic model: P(turn complete | transcript so far). Features look at the
+# last two tokens only — the coarse word class of each, the class bigram, a
+# few word-level overrides and any trailing punctuation — so "to the shop
+# and" waits while "yes I did it" fires, which a last-word lookup cannot
+# tell apart. Scoring is a handful of dict lookups (microseconds).
+#
+# Weights are log-odds; evaluate changes with scripts/eval_turn_gate.py.
+
+_WORD_CLASSES: dict[str, tuple[str, ...]] = {
+    "CONJ": (
+        "and", "but", "so", "or", "because", "cause", "cuz", "although",
+        "though", "while", "if", "as", "since", "until", "unless", "whereas",
+    ),
+    "PREP": (
+        "in", "at", "for", "with", "to", "about", "on", "of", "by", "from",
+        "into", "through", "before", "after", "above", "below", "between",
+        "among", "within", "without", "along", "across", "over", "under",
+        "around", "than",
+    ),
+    "DET": (
+        "the", "a", "an", "this", "these", "those", "my", "your", "their",
+        "our", "its", "his", "her", "some", "any", "each", "every", "more",
+        "most", "less", "few",
+    ),
+    "THAT": ("that",),
+    "SUBJ": ("i", "we", "they", "he", "she", "i'm", "we're", "they're", "it's"),
+    "IT": ("it", "you", "them", "him", "me", "us"),
+    "AUX": (
+        "is", "are", "am", "was", "were", "be", "been", "being", "have", "has",
+        "had", "do", "does", "did", "will", "would", "could", "should", "can",
+        "may", "might", "shall", "must", "get", "got", "gonna", "wanna",
+    ),
+    "COMP": (
+        "think", "guess", "believe", "feel", "mean", "know", "say", "said",
+        "hope", "wish", "want", "need", "suppose", "realize", "heard", "like",
+    ),
+    "WH": ("which", "who", "whom", "where", "when", "how", "what", "why"),
+    "FILLER": (
+        "just", "really", "very", "also", "even", "still", "already",
+        "actually", "basically", "kind", "sort", "um", "uh", "er", "erm",
+    ),
+    "HEDGE": ("maybe", "perhaps", "not", "probably"),
+    "ANSWER": (
+        "yes", "yeah", "yep", "no", "nope", "okay", "ok", "sure", "right",
+        "thanks", "alright", "exactly", "definitely", "bye",
+    ),
+}
+_CLASS_OF: dict[str, str] = {
+    word: cls for cls, words in _WORD_CLASSES.items() for word in words
+}
+
+_BIAS = 1.0
+_WEIGHTS: dict[str, float] = {
+    # Class of the last word
+    "c1=CONJ": -3.5, "c1=PREP": -3.0, "c1=DET": -3.5, "c1=THAT": -1.5,
+    "c1=SUBJ": -3.0, "c1=IT": -0.5, "c1=AUX": -2.0, "c1=COMP": -1.5,
+    "c1=WH": -1.5, "c1=FILLER": -1.5, "c1=HEDGE": -2.0, "c1=ANSWER": 1.5,
+    # Class bigram (second-to-last, last)
+    "c21=PREP IT": 2.0, "c21=AUX IT": 1.5, "c21=COMP IT": 1.5,
+    "c21=WORD IT": 1.5, "c21=FILLER IT": 1.0, "c21=CONJ IT": -1.5,
+    "c21=COMP THAT": -2.0, "c21=WORD THAT": 1.5, "c21=PREP THAT": 1.0,
+    "c21=AUX THAT": 0.5, "c21=CONJ THAT": -1.0,
+    "c21=SUBJ AUX": 1.5, "c21=IT AUX": 1.5, "c21=SUBJ COMP": -0.5,
+    "c21=ANSWER SUBJ": -0.5, "c21=THAT HEDGE": -0.5,
+    # Word-level overrides on top of the class weights
+    "w1=know": 1.5, "w1=mean": 0.5, "w1=though": 2.0, "w1=like": -0.5,
+    "w1=am": -1.0, "w1=was": -1.0, "w1=were": -1.0, "w1=be": -1.0,
+    "w1=been": -1.0, "w1=being": -1.0, "w1=get": -1.0, "w1=have": -0.5,
+    "w1=probably": 1.5, "w1=why": 1.0, "w1=more": 1.0,
+    # Word bigrams the class features get wrong
+    "w21=like that": 3.5, "w21=love that": 1.0, "w21=i mean": -1.0,
+    "w21=so that": -1.0, "w21=not sure": 2.5,
+    # Trailing punctuation (when Deepgram punctuation is enabled)
+    "end=.": 3.0, "end=?": 3.5, "end=!": 3.0, "end=,": -2.0, "end=…": -1.5,
+    # One-word segments are usually answers or acknowledgements
+    "n=1": 0.5,
+}
+
+_TOKEN_RE = re.compile(r"[a-z']+")
+_TRAILING_PUNCT = {".": ".", "?": "?", "!": "!", ",": ",", ";": ",", ":": ",", "…": "…"}
+
+
+def _word_class(word: str | None) -> str:
+    if word is None:
+        return "START"
+    return _CLASS_OF.get(word, "WORD")
+
+
+def turn_features(text: str) -> list[str]:
+    """Sparse features of the end of `text` for the completion model."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return []
+    last = tokens[-1]
+    prev = tokens[-2] if len(tokens) > 1 else None
+    c1, c2 = _word_class(last), _word_class(prev)
+    features = [f"c1={c1}", f"c21={c2} {c1}", f"w1={last}", f"w21={prev} {last}"]
+    tail = text.rstrip()
+    if tail.endswith("..."):
+        features.append("end=…")
+    elif tail and tail[-1] in _TRAILING_PUNCT:
+        features.append(f"end={_TRAILING_PUNCT[tail[-1]]}")
+    if len(tokens) == 1:
+        features.append("n=1")
+    return features
+
+
+def completion_probability(text: str) -> float:
+    """Probability that `text` is a finished turn (vs. a mid-turn pause)."""
+    features = turn_features(text)
+    if not features:
+        return 0.0
+    score = _BIAS + sum(_WEIGHTS.get(feature, 0.0) for feature in features)
+    return 1.0 / (1.0 + math.exp(-score))
+
+
+# ── Audio-clock endpointing ──────────────────────────────────────────────────
+
+class Endpointer:
+    """
+    Trailing silence measured on Deepgram's audio clock.
+
+    Every Results message carries `start` + `duration` (how far into the
+    stream Deepgram has processed) and per-word `start`/`end` timestamps.
+    The gap between the end of the last word and the audio cursor is real
+    silence in the user's audio, however late the message reached us — so
+    the gate can fire the moment that gap reaches the window instead of
+    sleeping a full window from whenever an event happened to arrive.
+    """
+
+    def __init__(self) -> None:
+        self.audio_cursor: float = 0.0          # seconds of audio transcribed
+        self.last_word_end: float | None = None
+        # Added to every timestamp: after an STT reconnect the new socket's
+        # clock restarts at zero (STTStream.clock_offset maps it back).
+        self.offset: float = 0.0
+
+    def observe(self, result: dict) -> list[dict]:
+        """Advance the clock from one Results message; returns its words.
+
+        Timestamps in `result` are shifted onto the session clock in place.
+        """
+        words = result["channel"]["alternatives"][0].get("words") or []
+        if self.offset:
+            if result.get("start") is not None:
+                result["start"] += self.offset
+            for word in words:
+                word["start"] += self.offset
+                word["end"] += self.offset
+        start, duration = result.get("start"), result.get("duration")
+        if start is not None and duration is not None:
+            self.audio_cursor = max(self.audio_cursor, start + duration)
+        if words:
+            self.last_word_end = max(self.last_word_end or 0.0, words[-1]["end"])
+            self.audio_cursor = max(self.audio_cursor, self.last_word_end)
+        return words
+
+    @property
+    def silence_ms(self) -> float:
+        if self.last_word_end is None:
+            return 0.0
+        return (self.audio_cursor - self.last_word_end) * 1000
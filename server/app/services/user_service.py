@@ -37,3 +37,19 @@ async def create_or_update_user(
     )
     doc.pop("_id", None)
     return User(**doc)
+
+
+async def get_pause_profile(google_id: str) -> dict | None:
+    """Return the stored utterance-gate pause histogram, or None."""
+    db = mongodb.db
+    doc = await db["users"].find_one({"google_id": google_id}, {"pause_profile": 1})
+    return doc.get("pause_profile") if doc else None
+
+
+async def save_pause_profile(google_id: str, profile: dict) -> None:
+    """Persist the user's utterance-gate pause histogram."""
+    db = mongodb.db
+    await db["users"].update_one(
+        {"google_id": google_id},
+        {"$set": {"pause_profile": profile}},
+    )
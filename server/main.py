@@ -1,5 +1,18 @@
 import uvicorn
 from app.core.config import settings
+from app.services.shutdown_service import drain_sessions
+
+
+class DrainingServer(uvicorn.Server):
+    """
+    Drains live /ws sessions before uvicorn's own shutdown, which would
+    otherwise drop every WebSocket at once (see shutdown_service).
+    """
+
+    async def shutdown(self, sockets=None):
+        await drain_sessions()
+        await super().shutdown(sockets=sockets)
+
 
 # PROTOTYPE WARNING:
 # The OAuth code store uses in-memory dict, which only works with a single worker.
@@ -8,9 +21,14 @@ from app.core.config import settings
 # Restricting to a single worker for prototype reliability.
 
 if __name__ == "__main__":
-    uvicorn.run(
+    config = uvicorn.Config(
         "app:app",
         host="0.0.0.0",
         port=settings.PORT,
         workers=1,  # DO NOT INCREASE unless you fix google_auth.py to use Redis
+        # Protocol-level pings keep proxies from idling the socket out and
+        # close browsers that stopped answering.
+        ws_ping_interval=settings.WS_PING_INTERVAL_S,
+        ws_ping_timeout=settings.WS_PING_TIMEOUT_S,
     )
+    DrainingServer(config).run()
@@ -0,0 +1,162 @@
+"""
+Turn-gate evaluation
+--------------------
+Offline check of the utterance gate's turn-completion model
+(app/services/turn_taking_service.py) against saved transcripts.
+
+Every saved user turn is a finished turn, so it is labelled complete. Each
+of its word-boundary prefixes is a point where the gate could have been
+asked mid-turn: prefixes ending in sentence punctuation are labelled
+complete, every other prefix incomplete. Some unpunctuated prefixes are
+grammatically complete, so the false-fire rate is an upper bound.
+
+  false fire : model fired on an incomplete prefix (user gets cut off)
+  false wait : model waited on a complete turn (user pays the silent window)
+
+Usage (from server/):
+    python scripts/eval_turn_gate.py --mongo                 # conversations collection
+    python scripts/eval_turn_gate.py --input turns.jsonl     # exported data
+    python scripts/eval_turn_gate.py --mongo --sweep         # threshold sweep
+
+--input lines are either labelled segments {"text": ..., "complete": bool}
+or conversation documents {"history": [{"role": ..., "content": ...}, ...]}.
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import app.db.mongodb as mongodb
+from app.core.config import settings
+from app.services.memory_mongo_service import iter_session_history
+from app.services.turn_taking_service import completion_probability
+
+_SENTENCE_END = re.compile(r"[.?!]$")
+
+
+def examples_from_turn(turn: str) -> list[tuple[str, bool]]:
+    """Labelled (text, complete) gate queries derived from one user turn."""
+    words = turn.split()
+    examples = []
+    for end in range(1, len(words)):
+        prefix = " ".join(words[:end])
+        examples.append((prefix, bool(_SENTENCE_END.search(prefix))))
+    if words:
+        examples.append((" ".join(words), True))
+    return examples
+
+
+def examples_from_history(history: list[dict]) -> list[tuple[str, bool]]:
+    examples = []
+    for message in history:
+        if message.get("role") == "user" and message.get("content"):
+            examples.extend(examples_from_turn(message["content"]))
+    return examples
+
+
+def load_file(path: str) -> list[tuple[str, bool]]:
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            doc = json.loads(line)
+            if "history" in doc:
+                examples.extend(examples_from_history(doc["history"]))
+            else:
+                examples.append((doc["text"], bool(doc["complete"])))
+    return examples
+
+
+def load_mongo(limit: int) -> list[tuple[str, bool]]:
+    return asyncio.run(_load_mongo(limit))
+
+
+async def _load_mongo(limit: int) -> list[tuple[str, bool]]:
+    # Same Tier 1 reader as the server (chunked and legacy layouts)
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    mongodb.db = client[settings.MONGODB_DB_NAME]
+    try:
+        headers = (
+            mongodb.db["conversations"]
+            .find({}, {"_id": 0})
+            .sort("started_at", -1)
+            .limit(limit)
+        )
+        examples = []
+        async for header in headers:
+            history = [
+                message
+                async for message in iter_session_history(
+                    header["google_id"], header["session_id"], header,
+                )
+            ]
+            examples.extend(examples_from_history(history))
+        return examples
+    finally:
+        client.close()
+
+
+def evaluate(scored: list[tuple[float, bool]], threshold: float) -> dict:
+    complete = [p for p, label in scored if label]
+    incomplete = [p for p, label in scored if not label]
+    false_fires = sum(p >= threshold for p in incomplete)
+    false_waits = sum(p < threshold for p in complete)
+    return {
+        "threshold": threshold,
+        "complete": len(complete),
+        "incomplete": len(incomplete),
+        "false_fire_rate": false_fires / len(incomplete) if incomplete else 0.0,
+        "false_wait_rate": false_waits / len(complete) if complete else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="JSONL file of labelled segments or conversation docs")
+    source.add_argument("--mongo", action="store_true", help="read the conversations collection")
+    parser.add_argument("--limit", type=int, default=500, help="sessions to read with --mongo")
+    parser.add_argument("--threshold", type=float, default=settings.TURN_COMPLETE_THRESHOLD)
+    parser.add_argument("--sweep", action="store_true", help="report rates for thresholds 0.1–0.9")
+    parser.add_argument("--errors", type=int, default=0, help="print up to N misclassified examples")
+    args = parser.parse_args()
+
+    examples = load_file(args.input) if args.input else load_mongo(args.limit)
+    if not examples:
+        print("No transcripts found.")
+        return
+
+    started = time.perf_counter()
+    scored = [(completion_probability(text), label) for text, label in examples]
+    per_decision_us = (time.perf_counter() - started) / len(examples) * 1e6
+
+    thresholds = [t / 10 for t in range(1, 10)] if args.sweep else [args.threshold]
+    print(f"{len(examples)} gate decisions | {per_decision_us:.1f} µs per decision")
+    print(f"{'threshold':>9}  {'false fire':>10}  {'false wait':>10}")
+    for threshold in thresholds:
+        result = evaluate(scored, threshold)
+        print(
+            f"{threshold:>9.2f}  {result['false_fire_rate']:>10.1%}  "
+            f"{result['false_wait_rate']:>10.1%}"
+        )
+
+    shown = 0
+    for (text, label), (p, _) in zip(examples, scored):
+        if shown >= args.errors:
+            break
+        if label != (p >= args.threshold):
+            kind = "false wait" if label else "false fire"
+            print(f"  {kind:<10} p={p:.2f}  {text!r}")
+            shown += 1
+
+
+if __name__ == "__main__":
+    main()
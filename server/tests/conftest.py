@@ -0,0 +1,8 @@
+"""
+Test setup — app.core.config refuses to import without its required
+variables, so give them placeholder values before any test imports it.
+"""
+import os
+
+for _name in ("GEMINI_MODEL", "GOOGLE_CLIENT_ID", "GOOGLE_CLIENT_SECRET", "JWT_SECRET"):
+    os.environ.setdefault(_name, "test")
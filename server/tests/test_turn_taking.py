@@ -0,0 +1,37 @@
+"""
+PauseProfile — the learned silent window of the utterance gate.
+"""
+from app.services.turn_taking_service import DEFAULT_WINDOW_MS, PauseProfile
+
+
+def _gate(profile: PauseProfile, pause_ms: float) -> None:
+    """One mid-turn pause through the gate: seen in full, or cut off."""
+    window_ms = profile.window_ms()
+    if pause_ms < window_ms:
+        profile.observe(pause_ms)
+    else:
+        profile.observe_censored(window_ms)
+
+
+def test_window_grows_for_long_pauses():
+    profile = PauseProfile()
+    for _ in range(60):
+        _gate(profile, 1900)
+    assert profile.window_ms() > 1900
+
+
+def test_window_shrinks_for_short_pauses():
+    profile = PauseProfile()
+    for _ in range(60):
+        _gate(profile, 300)
+    assert profile.window_ms() < DEFAULT_WINDOW_MS
+
+
+def test_censored_pauses_survive_a_round_trip():
+    profile = PauseProfile()
+    profile.observe(400)
+    profile.observe_censored(1200)
+    restored = PauseProfile.from_doc(profile.to_doc())
+    assert restored.bins == profile.bins
+    assert restored.censored == profile.censored
+    assert not any(PauseProfile.from_doc({"bin_ms": 50, "bins": [1]}).censored)
@@ -0,0 +1,44 @@
+"""
+Standalone job worker
+---------------------
+Runs the durable job queue (job_queue_service) — the post-session pipeline
+of analysis, Tier 2 and Tier 3 — outside the realtime server, so Gemini
+work scales separately from WebSocket capacity and never competes with the
+voice path for the event loop. Deployments run at least one of these next
+to the API server (JOB_WORKER_IN_PROCESS is off by default).
+
+Imports only the services the jobs need — the FastAPI app is never built
+(see app/__init__.py).
+
+    python worker.py
+"""
+import asyncio
+import signal
+
+from app.core.config import settings
+from app.db.mongodb import connect_db, close_db
+from app.services.heartbeat_service import heartbeat
+from app.services.job_queue_service import JobWorker
+from app.services.memory_pipeline_service import JOB_HANDLERS
+
+
+async def main() -> None:
+    await connect_db()
+    heartbeat.start()  # renews the leases of running jobs
+    worker = JobWorker(JOB_HANDLERS)
+    worker.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    print("💾 Worker shutting down — finishing running jobs...")
+    await worker.stop(timeout=settings.SHUTDOWN_DRAIN_TIMEOUT_S)
+    await heartbeat.stop()
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())